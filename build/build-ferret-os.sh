@@ -210,6 +210,8 @@ install_packages() {
         "systemd-timesyncd"
         "dbus"
         "initramfs-tools"
+        "zstd"
+        "lz4"
         
         # Live system essentials
         "live-boot"
@@ -686,15 +688,15 @@ SCRIPT_EOF
         chmod +x "$ROOT_DIR/usr/bin/ferret-welcome"
         # Create desktop entry for welcome app
         cat > "$ROOT_DIR/etc/xdg/autostart/ferret-welcome.desktop" << 'WELCOME_EOF'
-        [Desktop Entry]
-        Type=Application
-        Name=Ferret OS Welcome
-        Exec=ferret-welcome
-        Hidden=false
-        NoDisplay=false
-        X-GNOME-Autostart-enabled=true
-        OnlyShowIn=XFCE;
-        WELCOME_EOF
+[Desktop Entry]
+Type=Application
+Name=Ferret OS Welcome
+Exec=ferret-welcome --autostart
+Hidden=false
+NoDisplay=false
+X-GNOME-Autostart-enabled=true
+OnlyShowIn=XFCE;
+WELCOME_EOF
 
         # Install dependencies for welcome app
         chroot "$ROOT_DIR" /bin/bash -c "
@@ -766,6 +768,45 @@ EOF
     success "Modern branding applied"
 }
 
+# Install the Ferret support library and the system services built on it;
+# they run whether or not the welcome app is part of the image
+install_ferret_services() {
+    log "Installing Ferret OS system services..."
+    
+    mkdir -p "$ROOT_DIR/usr/lib/python3/dist-packages"
+    # Ferret support library used by the welcome app and system tools
+    cp -r "packages/ferret" "$ROOT_DIR/usr/lib/python3/dist-packages/"
+    cp "packages/ferret-boot-analyze.py" "$ROOT_DIR/usr/bin/ferret-boot-analyze"
+    chmod +x "$ROOT_DIR/usr/bin/ferret-boot-analyze"
+
+    # Adaptive preloader; exits at once unless [Performance] EnablePreload=true
+    cp "packages/ferret-preload.py" "$ROOT_DIR/usr/sbin/ferret-preload"
+    chmod +x "$ROOT_DIR/usr/sbin/ferret-preload"
+    cat > "$ROOT_DIR/etc/systemd/system/ferret-preload.service" << 'PRELOAD_EOF'
+[Unit]
+Description=Ferret OS adaptive application preloader
+Documentation=file:///etc/ferret/ferret-defaults.conf
+After=local-fs.target
+
+[Service]
+Type=simple
+ExecStart=/usr/sbin/ferret-preload run
+StateDirectory=ferret-preload
+Nice=19
+IOSchedulingClass=idle
+CPUSchedulingPolicy=idle
+MemoryMax=64M
+ProtectSystem=strict
+ProtectHome=read-only
+
+[Install]
+WantedBy=graphical.target
+PRELOAD_EOF
+    chroot "$ROOT_DIR" systemctl enable ferret-preload.service
+    
+    success "Ferret OS system services installed"
+}
+
 # Configure Calamares installer
 configure_installer() {
     log "Configuring Calamares installer..."
@@ -794,6 +835,14 @@ instances:
   module:   displaymanager
   config:   displaymanager.conf
 
+- id:       prefetch
+  module:   ferretpackages
+  config:   ferretpackages-prefetch.conf
+
+- id:       ferret
+  module:   ferretpackages
+  config:   ferretpackages.conf
+
 sequence:
 - show:
   - welcome
@@ -805,7 +854,8 @@ sequence:
 - exec:
   - partition
   - mount
-  - unpackfs
+  - ferretpackages@prefetch
+  - ferretunpackfs
   - machineid
   - fstab
   - locale
@@ -816,6 +866,7 @@ sequence:
   - networkcfg
   - hwclock
   - services-systemd
+  - ferretpackages@ferret
   - bootloader
   - umount
 - show:
@@ -877,6 +928,15 @@ BRANDING_EOF
         cp "calamares_slideshow.qml" "$ROOT_DIR/etc/calamares/branding/ferret/show.qml"
     fi
 
+    # Install Ferret Calamares job modules (parallel unpackfs, offline packages)
+    if [[ -d "installer/modules" ]]; then
+        mkdir -p "$ROOT_DIR/usr/lib/calamares/modules"
+        for module_dir in installer/modules/*/; do
+            cp -r "$module_dir" "$ROOT_DIR/usr/lib/calamares/modules/"
+            cp "$module_dir"*.conf "$ROOT_DIR/etc/calamares/modules/" 2>/dev/null || true
+        done
+    fi
+
     # Users module configuration
     cat > "$ROOT_DIR/etc/calamares/modules/users.conf" << 'USERS_EOF'
 defaultGroups:
@@ -963,14 +1023,69 @@ setup_flatpak() {
 configure_security() {
     log "Configuring security..."
     
-    # Install and configure UFW
+    # Install firewall tooling; UFW stays available but is not enabled because
+    # the compiled ruleset below replaces its rule-by-rule startup
     chroot "$ROOT_DIR" /bin/bash -c "
-        apt-get install -y ufw apparmor apparmor-utils
-        ufw --force enable
-        systemctl enable ufw
+        apt-get install -y nftables ufw apparmor apparmor-utils
+        systemctl disable ufw || true
         systemctl enable apparmor
     "
     
+    # Unattended upgrades as set by [Security] AutomaticUpdates; the welcome
+    # app reports these updates as installing automatically
+    local automatic_updates=$(PYTHONPATH=packages python3 -c \
+        "from ferret.config import load_defaults; from ferret.updates import automatic_policy; \
+print(automatic_policy(load_defaults('config/ferret-defaults.conf')))")
+    local periodic=1
+    [[ "$automatic_updates" == "none" ]] && periodic=0
+    chroot "$ROOT_DIR" apt-get install -y unattended-upgrades
+    cat > "$ROOT_DIR/etc/apt/apt.conf.d/20auto-upgrades" << EOF
+APT::Periodic::Update-Package-Lists "$periodic";
+APT::Periodic::Unattended-Upgrade "$periodic";
+EOF
+    # Debian's 50unattended-upgrades already allows the security origin
+    if [[ "$automatic_updates" == "all" ]]; then
+        cat > "$ROOT_DIR/etc/apt/apt.conf.d/52ferret-unattended-upgrades" << 'UNATTENDED_EOF'
+Unattended-Upgrade::Origins-Pattern {
+        "origin=Debian,codename=${distro_codename},label=Debian";
+        "origin=Debian,codename=${distro_codename}-updates";
+};
+UNATTENDED_EOF
+    fi
+
+    # Compile ufw-rules.conf into one nftables transaction
+    PYTHONPATH=packages python3 packages/ferret-firewall.py check config/ufw-rules.conf || \
+        error "Compiled firewall ruleset is not equivalent to ufw-rules.conf"
+    PYTHONPATH=packages python3 packages/ferret-firewall.py compile config/ufw-rules.conf \
+        -o "$ROOT_DIR/etc/ferret/firewall.nft"
+    
+    cp "packages/ferret-firewall.py" "$ROOT_DIR/usr/sbin/ferret-firewall"
+    chmod +x "$ROOT_DIR/usr/sbin/ferret-firewall"
+    
+    # Load the ruleset atomically before any network interface comes up
+    cat > "$ROOT_DIR/etc/systemd/system/ferret-firewall.service" << 'FIREWALL_EOF'
+[Unit]
+Description=Ferret OS firewall (compiled nftables ruleset)
+Documentation=file:///etc/ferret/ufw-rules.conf
+DefaultDependencies=no
+Before=network-pre.target shutdown.target
+Wants=network-pre.target
+Conflicts=shutdown.target ufw.service
+
+[Service]
+Type=oneshot
+RemainAfterExit=yes
+ExecStart=/usr/sbin/nft -f /etc/ferret/firewall.nft
+ExecReload=/usr/sbin/nft -f /etc/ferret/firewall.nft
+ExecStop=/usr/sbin/nft delete table ip ferret
+ExecStop=-/usr/sbin/nft delete table ip6 ferret
+
+[Install]
+WantedBy=sysinit.target
+FIREWALL_EOF
+    
+    chroot "$ROOT_DIR" systemctl enable ferret-firewall.service
+    
     success "Security configured"
 }
 
@@ -980,13 +1095,12 @@ configure_boot() {
     
     # Configure initramfs
     chroot "$ROOT_DIR" /bin/bash -c "
-        # Configure initramfs for live boot
+        # Configure initramfs for live boot; the installed system keeps
+        # MODULES=most, the live images are built by ferret-initramfs below
         echo 'BOOT=live' >> /etc/initramfs-tools/initramfs.conf
-        echo 'MODULES=most' >> /etc/initramfs-tools/initramfs.conf
-        echo 'COMPRESS=xz' >> /etc/initramfs-tools/initramfs.conf
+        echo 'COMPRESS=zstd' >> /etc/initramfs-tools/initramfs.conf
         
         # Add live boot components
-        echo 'live-boot' >> /etc/initramfs-tools/modules
         echo 'overlay' >> /etc/initramfs-tools/modules
         echo 'squashfs' >> /etc/initramfs-tools/modules
         echo 'loop' >> /etc/initramfs-tools/modules
@@ -1015,9 +1129,95 @@ GRUB_CONFIG_EOF
         update-grub || echo 'GRUB update failed, continuing...'
     "
     
+    # Live initramfs: only the module closure needed to find and mount the
+    # medium, plus a MODULES=most image for hardware the closure misses
+    mkdir -p "$BUILD_DIR/initrd"
+    PYTHONPATH=packages python3 -m ferret.initramfs --root "$ROOT_DIR" --variant minimal \
+        --compress zstd -o "$BUILD_DIR/initrd/initrd" || warning "Minimal initramfs build failed"
+    PYTHONPATH=packages python3 -m ferret.initramfs --root "$ROOT_DIR" --variant generic \
+        --compress zstd -o "$BUILD_DIR/initrd/initrd-generic" || warning "Generic initramfs build failed"
+    
+    # Live media check, run instead of the desktop when booted with ferret.mediacheck
+    cp "packages/ferret-mediacheck.py" "$ROOT_DIR/usr/bin/ferret-mediacheck"
+    chmod +x "$ROOT_DIR/usr/bin/ferret-mediacheck"
+    cat > "$ROOT_DIR/etc/systemd/system/ferret-mediacheck.service" << 'MEDIACHECK_EOF'
+[Unit]
+Description=Check Ferret OS live media for defects
+ConditionKernelCommandLine=ferret.mediacheck
+ConditionPathExists=/run/live/medium/ferret-mediacheck.json
+After=local-fs.target
+Before=display-manager.service getty@tty1.service
+
+[Service]
+Type=oneshot
+StandardInput=tty
+StandardOutput=tty
+TTYPath=/dev/tty1
+ExecStart=-/usr/bin/ferret-mediacheck verify /run/live/medium/ferret-mediacheck.json --root /run/live/medium
+ExecStartPost=/bin/sh -c 'read -p "Press Enter to reboot" reply; systemctl reboot'
+
+[Install]
+WantedBy=sysinit.target
+MEDIACHECK_EOF
+    chroot "$ROOT_DIR" systemctl enable ferret-mediacheck.service
+    
     success "Boot system configured"
 }
 
+# Create the offline package pool used by the installer
+create_package_pool() {
+    log "Creating offline package pool..."
+    
+    # Packages installed on the target but not needed in the live session
+    local pool_packages=(
+        "shim-signed"
+        "grub-efi-amd64-signed"
+        "cryptsetup-initramfs"
+        "efibootmgr"
+    )
+    
+    # Flatpak refs bundled for offline installation (runtimes are added automatically)
+    local pool_flatpaks=()
+    
+    local pool_dir="$BUILD_DIR/pool"
+    mkdir -p "$pool_dir/debs" "$pool_dir/flatpak" "$ROOT_DIR/tmp/ferret-pool/partial"
+    
+    # Resolve against the live root: the target starts as an exact copy of it,
+    # so the downloaded set is exactly what the target is missing
+    chroot "$ROOT_DIR" /bin/bash -c "
+        export DEBIAN_FRONTEND=noninteractive
+        apt-get install -y --download-only \
+            -o Dir::Cache::archives=/tmp/ferret-pool \
+            ${pool_packages[*]} || echo 'Some pool packages are not available'
+    "
+    mv "$ROOT_DIR"/tmp/ferret-pool/*.deb "$pool_dir/debs/" 2>/dev/null || true
+    rm -rf "$ROOT_DIR/tmp/ferret-pool"
+    
+    if [[ ${#pool_flatpaks[@]} -gt 0 ]]; then
+        : > "$pool_dir/flatpak/order"
+        for ref in "${pool_flatpaks[@]}"; do
+            chroot "$ROOT_DIR" /bin/bash -c "
+                flatpak install -y --noninteractive flathub $ref
+                runtime=\$(flatpak info --show-runtime $ref)
+                flatpak build-bundle --runtime /var/lib/flatpak/repo /tmp/\${runtime//\//_}.flatpak \${runtime%%/*} \${runtime##*/}
+                flatpak build-bundle /var/lib/flatpak/repo /tmp/$ref.flatpak $ref stable
+                flatpak uninstall -y --noninteractive $ref
+                flatpak uninstall -y --noninteractive --unused
+                echo \${runtime//\//_}.flatpak
+            " | tail -1 >> "$pool_dir/flatpak/order"
+            echo "$ref.flatpak" >> "$pool_dir/flatpak/order"
+            mv "$ROOT_DIR"/tmp/*.flatpak "$pool_dir/flatpak/"
+        done
+        # A runtime shared by several apps only needs to be installed once
+        awk '!seen[$0]++' "$pool_dir/flatpak/order" > "$pool_dir/flatpak/order.tmp"
+        mv "$pool_dir/flatpak/order.tmp" "$pool_dir/flatpak/order"
+    fi
+    
+    python3 installer/modules/ferretpackages/main.py --pool "$pool_dir" --build-manifest
+    
+    success "Package pool created ($(du -sh "$pool_dir" | cut -f1))"
+}
+
 # Clean up chroot
 cleanup_chroot() {
     log "Cleaning up chroot environment..."
@@ -1087,16 +1287,37 @@ prepare_iso() {
         error "Kernel not found in $ROOT_DIR/boot/"
     fi
     
-    if [[ -f "$initrd_file" ]]; then
+    if [[ -f "$BUILD_DIR/initrd/initrd" ]]; then
+        cp "$BUILD_DIR/initrd/initrd" "$BUILD_DIR/iso/live/initrd"
+        log "Minimal live initrd copied"
+    elif [[ -f "$initrd_file" ]]; then
         cp "$initrd_file" "$BUILD_DIR/iso/live/initrd"
         log "Initrd copied: $(basename $initrd_file)"
     else
         error "Initrd not found in $ROOT_DIR/boot/"
     fi
     
+    # Fallback for hardware outside the minimal module set
+    if [[ -f "$BUILD_DIR/initrd/initrd-generic" ]]; then
+        cp "$BUILD_DIR/initrd/initrd-generic" "$BUILD_DIR/iso/live/initrd-generic"
+    else
+        cp "$BUILD_DIR/iso/live/initrd" "$BUILD_DIR/iso/live/initrd-generic"
+    fi
+    
     # Copy squashfs
     cp "$BUILD_DIR/live/filesystem.squashfs" "$BUILD_DIR/iso/live/"
     
+    # Copy offline package pool for the installer
+    if [[ -d "$BUILD_DIR/pool" ]]; then
+        cp -r "$BUILD_DIR/pool" "$BUILD_DIR/iso/"
+    fi
+    
+    # Chunk manifest for the "Check media" boot entry
+    local checked_paths=(live)
+    [[ -d "$BUILD_DIR/iso/pool" ]] && checked_paths+=(pool)
+    PYTHONPATH=packages python3 packages/ferret-mediacheck.py generate \
+        --root "$BUILD_DIR/iso" -o "$BUILD_DIR/iso/ferret-mediacheck.json" "${checked_paths[@]}"
+    
     # Copy GRUB files for BIOS boot
     if [[ -d /usr/lib/grub/i386-pc ]]; then
         cp -r /usr/lib/grub/i386-pc "$BUILD_DIR/iso/boot/grub/"
@@ -1190,11 +1411,21 @@ menuentry "Ferret OS Live (Safe Mode)" {
     initrd /live/initrd
 }
 
+menuentry "Ferret OS Live (Generic Drivers)" {
+    linux /live/vmlinuz boot=live components quiet splash plymouth.theme=ferret
+    initrd /live/initrd-generic
+}
+
 menuentry "Ferret OS Live (Persistent)" {
     linux /live/vmlinuz boot=live components persistent quiet splash plymouth.theme=ferret
     initrd /live/initrd
 }
 
+menuentry "Check media for defects" {
+    linux /live/vmlinuz boot=live components ferret.mediacheck
+    initrd /live/initrd
+}
+
 menuentry "Memory Test (if available)" {
     linux16 /boot/memtest86+.bin
 }
@@ -1228,10 +1459,20 @@ LABEL safe
     KERNEL /live/vmlinuz
     APPEND initrd=/live/initrd boot=live components quiet splash nomodeset plymouth.theme=ferret
 
+LABEL generic
+    MENU LABEL Ferret OS Live (^Generic Drivers)
+    KERNEL /live/vmlinuz
+    APPEND initrd=/live/initrd-generic boot=live components quiet splash plymouth.theme=ferret
+
 LABEL persistent
     MENU LABEL Ferret OS Live (^Persistent)
     KERNEL /live/vmlinuz
     APPEND initrd=/live/initrd boot=live components persistent quiet splash plymouth.theme=ferret
+
+LABEL check
+    MENU LABEL ^Check media for defects
+    KERNEL /live/vmlinuz
+    APPEND initrd=/live/initrd boot=live components ferret.mediacheck
 EOF
     
     # Copy splash image for isolinux
@@ -1261,6 +1502,16 @@ menuentry "Ferret OS Live (UEFI Safe Mode)" {
     linux /live/vmlinuz boot=live components quiet splash nomodeset plymouth.theme=ferret
     initrd /live/initrd
 }
+
+menuentry "Ferret OS Live (UEFI Generic Drivers)" {
+    linux /live/vmlinuz boot=live components quiet splash plymouth.theme=ferret
+    initrd /live/initrd-generic
+}
+
+menuentry "Check media for defects (UEFI)" {
+    linux /live/vmlinuz boot=live components ferret.mediacheck
+    initrd /live/initrd
+}
 EOF
     
     # Copy EFI boot files if available
@@ -1328,6 +1579,10 @@ create_iso() {
     sha256sum "$iso_name" > "${iso_name}.sha256"
     cd - > /dev/null
     
+    # Chunk manifest so testing/test-iso.sh can verify in parallel and locate damage
+    PYTHONPATH=packages python3 packages/ferret-mediacheck.py generate \
+        --root "$ISO_DIR" -o "$ISO_DIR/${iso_name}.merkle" "$iso_name"
+    
     # Show ISO size
     local iso_size=$(du -h "$ISO_DIR/$iso_name" | cut -f1)
     success "ISO created: $ISO_DIR/$iso_name ($iso_size)"
@@ -1348,10 +1603,12 @@ main() {
     install_packages
     configure_system
     apply_branding
+    install_ferret_services
     configure_installer
     setup_flatpak
     configure_security
     configure_boot
+    create_package_pool
     cleanup_chroot
     create_squashfs
     prepare_iso
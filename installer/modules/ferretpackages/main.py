@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Ferret OS offline package stage for Calamares
+Installs pre-resolved .debs and flatpak bundles from the live medium pool
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import libcalamares
+except ImportError:
+    # Running standalone (pool creation, offline testing)
+    libcalamares = None
+
+MANIFEST = "manifest.json"
+TARGET_POOL = "var/cache/ferret-pool"
+DPKG_ENV = dict(os.environ, DEBIAN_FRONTEND="noninteractive", APT_LISTCHANGES_FRONTEND="none")
+
+
+def pretty_name():
+    return "Installing packages"
+
+
+def debug(message):
+    if libcalamares:
+        libcalamares.utils.debug(message)
+    else:
+        print(message, file=sys.stderr)
+
+
+def read_manifest(pool):
+    """Load the pool manifest, or an empty one when there is no pool"""
+    path = os.path.join(pool, MANIFEST)
+    if not os.path.exists(path):
+        return {"debs": [], "flatpaks": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_manifest(pool):
+    """Write manifest.json for a pool directory populated by the build"""
+    debs = []
+    for path in sorted(glob.glob(os.path.join(pool, "debs", "*.deb"))):
+        fields = subprocess.run(
+            ["dpkg-deb", "--show", "--showformat=${Package}\\t${Version}\\t${Architecture}", path],
+            capture_output=True, text=True, check=True,
+        ).stdout.split("\t")
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        debs.append({
+            "package": fields[0],
+            "version": fields[1],
+            "architecture": fields[2],
+            "file": os.path.relpath(path, pool),
+            "sha256": digest.hexdigest(),
+        })
+
+    flatpaks = []
+    order_file = os.path.join(pool, "flatpak", "order")
+    if os.path.exists(order_file):
+        # Runtimes have to be installed before the apps that use them
+        with open(order_file) as f:
+            for line in f:
+                name = line.strip()
+                if name:
+                    flatpaks.append({"file": os.path.join("flatpak", name)})
+
+    with open(os.path.join(pool, MANIFEST), "w") as f:
+        json.dump({"debs": debs, "flatpaks": flatpaks}, f, indent=2)
+    return len(debs), len(flatpaks)
+
+
+def installed_packages(root):
+    """Parse the target dpkg status database into {package: version}"""
+    installed = {}
+    package = version = None
+    ok = False
+    with open(os.path.join(root, "var/lib/dpkg/status")) as f:
+        for line in f:
+            if line.startswith("Package: "):
+                package = line[9:].strip()
+            elif line.startswith("Status: "):
+                ok = line.rstrip().endswith(" installed")
+            elif line.startswith("Version: "):
+                version = line[9:].strip()
+            elif line == "\n":
+                if package and ok:
+                    installed[package] = version
+                package = version = None
+                ok = False
+    if package and ok:
+        installed[package] = version
+    return installed
+
+
+def plan(pool, prefetch_dir, root, remove):
+    """Compute (debs_to_install, packages_to_remove, flatpak_bundles)"""
+    manifest = read_manifest(pool)
+    installed = installed_packages(root)
+
+    debs = [
+        os.path.join(pool, deb["file"]) for deb in manifest["debs"]
+        if installed.get(deb["package"]) != deb["version"]
+    ]
+    if prefetch_dir and os.path.isdir(prefetch_dir):
+        debs.extend(sorted(glob.glob(os.path.join(prefetch_dir, "*.deb"))))
+
+    removals = [package for package in remove if package in installed]
+    flatpaks = [os.path.join(pool, bundle["file"]) for bundle in manifest["flatpaks"]]
+    return debs, removals, flatpaks
+
+
+def has_default_route():
+    """Cheap online check that never touches the network"""
+    try:
+        with open("/proc/net/route") as f:
+            next(f)
+            return any(line.split()[1] == "00000000" for line in f)
+    except (OSError, StopIteration, IndexError):
+        return False
+
+
+def start_prefetch(prefetch_dir, packages):
+    """Download optional packages in the background while unpackfs runs"""
+    if not packages:
+        return "nothing to prefetch"
+    if not has_default_route():
+        return "offline, skipping prefetch"
+
+    os.makedirs(os.path.join(prefetch_dir, "partial"), exist_ok=True)
+    names = " ".join(packages)
+    script = (
+        "apt-get update -qq && "
+        f"apt-get install -y -qq --download-only -o Dir::Cache::archives={prefetch_dir} {names}"
+    )
+    with open(os.path.join(prefetch_dir, "prefetch.log"), "w") as log:
+        process = subprocess.Popen(
+            ["sh", "-c", script], stdout=log, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL, start_new_session=True, env=DPKG_ENV,
+        )
+    with open(os.path.join(prefetch_dir, "prefetch.pid"), "w") as f:
+        f.write(str(process.pid))
+    return f"prefetching {len(packages)} packages (pid {process.pid})"
+
+
+def wait_for_prefetch(prefetch_dir, timeout):
+    """Block until a background prefetch has finished, or give up on it"""
+    pid_file = os.path.join(prefetch_dir, "prefetch.pid")
+    if not os.path.exists(pid_file):
+        return True
+    with open(pid_file) as f:
+        pid = int(f.read().strip())
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                return True
+        except ChildProcessError:
+            # Not our child (separate job process): fall back to probing
+            if not os.path.exists(f"/proc/{pid}"):
+                return True
+        time.sleep(0.5)
+
+    debug(f"ferretpackages: prefetch still running after {timeout}s, ignoring it")
+    return False
+
+
+def chroot_run(root, command):
+    if root == "/":
+        subprocess.run(command, check=True, env=DPKG_ENV)
+    else:
+        subprocess.run(["chroot", root] + command, check=True, env=DPKG_ENV)
+
+
+def install(root, debs, removals, flatpaks, report):
+    """Run the package stage against the target root"""
+    if removals:
+        debug(f"ferretpackages: purging {' '.join(removals)}")
+        chroot_run(root, ["dpkg", "--purge", "--no-triggers"] + removals)
+    report(0.1)
+
+    if debs or flatpaks:
+        # Expose the pool inside the target without copying it
+        mounts = []
+        try:
+            for index, source in enumerate(sorted({os.path.dirname(path) for path in debs + flatpaks})):
+                mountpoint = os.path.join(root, TARGET_POOL, str(index))
+                os.makedirs(mountpoint, exist_ok=True)
+                subprocess.run(["mount", "--bind", "-o", "ro", source, mountpoint], check=True)
+                mounts.append((source, mountpoint))
+
+            def inside(path):
+                for source, mountpoint in mounts:
+                    if os.path.dirname(path) == source:
+                        return "/" + os.path.relpath(os.path.join(mountpoint, os.path.basename(path)), root)
+                return path
+
+            if debs:
+                debug(f"ferretpackages: installing {len(debs)} packages from the pool")
+                # Unpack and configure everything in one dpkg run with
+                # triggers deferred, then process all triggers once
+                chroot_run(root, ["dpkg", "--install", "--no-triggers",
+                                  "--force-confdef", "--force-confold"] + [inside(deb) for deb in debs])
+            report(0.6)
+
+            for bundle in flatpaks:
+                debug(f"ferretpackages: installing flatpak bundle {os.path.basename(bundle)}")
+                chroot_run(root, ["flatpak", "install", "--system", "--noninteractive",
+                                  "--assumeyes", "--bundle", inside(bundle)])
+        finally:
+            for _, mountpoint in reversed(mounts):
+                subprocess.run(["umount", mountpoint], check=False)
+                os.rmdir(mountpoint)
+            if os.path.isdir(os.path.join(root, TARGET_POOL)):
+                os.rmdir(os.path.join(root, TARGET_POOL))
+
+    if debs or removals:
+        # Triggers deferred by both dpkg runs (initramfs, man-db, ...) run once
+        chroot_run(root, ["dpkg", "--triggers-only", "--pending"])
+    report(1.0)
+
+
+def run():
+    """Calamares job entry point"""
+    config = libcalamares.job.configuration or {}
+    prefetch_dir = config.get("prefetchDir", "/run/ferret-prefetch")
+
+    if config.get("mode", "install") == "prefetch":
+        debug(f"ferretpackages: {start_prefetch(prefetch_dir, config.get('extraInstall') or [])}")
+        return None
+
+    root = libcalamares.globalstorage.value("rootMountPoint")
+    if not root or not os.path.isdir(root):
+        return ("Bad mount point for root partition",
+                "globalstorage does not contain a valid \"rootMountPoint\" key.")
+
+    if not wait_for_prefetch(prefetch_dir, int(config.get("prefetchTimeout", 300))):
+        # A download still in progress may have left truncated archives behind
+        prefetch_dir = None
+    debs, removals, flatpaks = plan(config.get("pool", "/run/live/medium/pool"),
+                                    prefetch_dir, root, config.get("remove") or [])
+    try:
+        install(root, debs, removals, flatpaks, libcalamares.job.setprogress)
+    except (OSError, subprocess.CalledProcessError) as e:
+        return ("Package installation failed", str(e))
+    return None
+
+
+def main():
+    """Standalone entry point for pool creation and offline testing"""
+    parser = argparse.ArgumentParser(description="Ferret OS offline package stage")
+    parser.add_argument("--pool", required=True, help="pool directory")
+    parser.add_argument("--build-manifest", action="store_true",
+                        help="write manifest.json for the pool and exit")
+    parser.add_argument("--root", help="target root to install into")
+    parser.add_argument("--prefetch-dir")
+    parser.add_argument("--remove", nargs="*", default=[])
+    parser.add_argument("--dry-run", action="store_true", help="print the plan only")
+    args = parser.parse_args()
+
+    if args.build_manifest:
+        debs, flatpaks = build_manifest(args.pool)
+        print(f"manifest: {debs} debs, {flatpaks} flatpak bundles")
+        return
+    if not args.root:
+        parser.error("--root is required unless --build-manifest is given")
+
+    debs, removals, flatpaks = plan(args.pool, args.prefetch_dir, args.root, args.remove)
+    print(json.dumps({"install": debs, "remove": removals, "flatpaks": flatpaks}, indent=2))
+    if not args.dry_run:
+        start = time.monotonic()
+        install(args.root, debs, removals, flatpaks, lambda fraction: None)
+        print(f"elapsed={time.monotonic() - start:.3f}")
+
+
+if __name__ == "__main__":
+    main()
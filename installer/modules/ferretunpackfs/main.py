@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Ferret OS parallel unpackfs module for Calamares
+Extracts the live filesystem onto the target with multiple worker threads
+"""
+
+import argparse
+import errno
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import libcalamares
+except ImportError:
+    # Running standalone (benchmarks, manual testing)
+    libcalamares = None
+
+# Errors that mean "this copy method is not available here, try the next one"
+FALLBACK_ERRNOS = (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF)
+COPY_BLOCK = 16 * 1024 * 1024
+PROGRESS_INTERVAL = 0.25
+
+
+def pretty_name():
+    return "Extracting the live filesystem"
+
+
+def debug(message):
+    if libcalamares:
+        libcalamares.utils.debug(message)
+
+
+class ByteProgress:
+    """Thread-safe progress counter reported as a fraction of total bytes"""
+
+    def __init__(self, total, callback):
+        self.total = max(total, 1)
+        self.callback = callback
+        self.done = 0
+        self.lock = threading.Lock()
+        self.last_report = 0.0
+
+    def add(self, count):
+        with self.lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self.last_report < PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+            fraction = self.done / self.total
+        self.callback(min(fraction, 1.0))
+
+
+class Extractor:
+    """Copy a mounted source tree onto the target using a thread pool"""
+
+    def __init__(self, source, destination, workers=0, shard_size=64 << 20, callback=None):
+        self.source = source
+        self.destination = destination
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.callback = callback or (lambda fraction: None)
+        self.use_copy_file_range = hasattr(os, "copy_file_range")
+        self.use_sendfile = True
+        self.directories = []
+        self.files = []
+        self.hardlinks = []
+        self.total_bytes = 0
+
+    def scan(self):
+        """Walk the source, create the directory skeleton and collect file entries"""
+        first_links = {}
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            source_dir = os.path.join(self.source, relative)
+            with os.scandir(source_dir) as entries:
+                for entry in entries:
+                    path = os.path.join(relative, entry.name)
+                    st = entry.stat(follow_symlinks=False)
+                    if stat.S_ISDIR(st.st_mode):
+                        os.makedirs(os.path.join(self.destination, path), exist_ok=True)
+                        self.directories.append((path, st))
+                        stack.append(path)
+                        continue
+                    if stat.S_ISREG(st.st_mode) and st.st_nlink > 1:
+                        key = (st.st_dev, st.st_ino)
+                        if key in first_links:
+                            self.hardlinks.append((path, first_links[key]))
+                            continue
+                        first_links[key] = path
+                    if stat.S_ISREG(st.st_mode):
+                        self.total_bytes += st.st_size
+                    self.files.append((path, st))
+
+    def shards(self):
+        """Split the file list into contiguous runs of roughly shard_size bytes"""
+        shard, size = [], 0
+        for item in self.files:
+            shard.append(item)
+            size += item[1].st_size if stat.S_ISREG(item[1].st_mode) else 0
+            if size >= self.shard_size or len(shard) >= 4096:
+                yield shard
+                shard, size = [], 0
+        if shard:
+            yield shard
+
+    def copy_data(self, src_fd, dst_fd, size, progress):
+        """Copy file contents in kernel space where the filesystems allow it"""
+        offset = 0
+        if self.use_copy_file_range:
+            try:
+                while offset < size:
+                    copied = os.copy_file_range(src_fd, dst_fd, min(COPY_BLOCK, size - offset))
+                    if copied == 0:
+                        break
+                    offset += copied
+                    progress.add(copied)
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in FALLBACK_ERRNOS or offset:
+                    raise
+                # squashfs to ext4 is cross-filesystem: stop trying for every file
+                self.use_copy_file_range = False
+        if self.use_sendfile:
+            try:
+                while offset < size:
+                    copied = os.sendfile(dst_fd, src_fd, offset, min(COPY_BLOCK, size - offset))
+                    if copied == 0:
+                        break
+                    offset += copied
+                    progress.add(copied)
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in FALLBACK_ERRNOS or offset:
+                    raise
+                self.use_sendfile = False
+        os.lseek(src_fd, offset, os.SEEK_SET)
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        while True:
+            block = os.read(src_fd, COPY_BLOCK)
+            if not block:
+                break
+            os.write(dst_fd, block)
+            progress.add(len(block))
+
+    def copy_file(self, path, st, progress):
+        """Recreate a single non-directory entry on the target"""
+        source = os.path.join(self.source, path)
+        target = os.path.join(self.destination, path)
+        mode = st.st_mode
+
+        if os.path.lexists(target) and not stat.S_ISDIR(os.lstat(target).st_mode):
+            os.unlink(target)
+
+        if stat.S_ISREG(mode):
+            src_fd = os.open(source, os.O_RDONLY)
+            try:
+                dst_fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                try:
+                    if st.st_size:
+                        try:
+                            os.posix_fallocate(dst_fd, 0, st.st_size)
+                        except OSError as e:
+                            if e.errno not in FALLBACK_ERRNOS:
+                                raise
+                        self.copy_data(src_fd, dst_fd, st.st_size, progress)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
+        elif stat.S_ISLNK(mode):
+            os.symlink(os.readlink(source), target)
+        else:
+            # Device nodes, FIFOs and sockets
+            os.mknod(target, mode, st.st_rdev)
+
+        self.apply_metadata(source, target, st)
+
+    def apply_metadata(self, source, target, st):
+        """Copy ownership, permissions, xattrs and timestamps"""
+        is_link = stat.S_ISLNK(st.st_mode)
+        os.chown(target, st.st_uid, st.st_gid, follow_symlinks=False)
+        if not is_link:
+            os.chmod(target, stat.S_IMODE(st.st_mode))
+        # chown drops security.capability, so xattrs have to come after it
+        try:
+            for name in os.listxattr(source, follow_symlinks=False):
+                value = os.getxattr(source, name, follow_symlinks=False)
+                os.setxattr(target, name, value, follow_symlinks=False)
+        except OSError as e:
+            if e.errno not in (errno.ENOTSUP, errno.EPERM):
+                raise
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=False)
+
+    def copy_shard(self, shard, progress):
+        for path, st in shard:
+            self.copy_file(path, st, progress)
+
+    def run(self):
+        """Extract everything, returning the number of bytes copied"""
+        os.makedirs(self.destination, exist_ok=True)
+        self.scan()
+        debug(f"ferretunpackfs: {len(self.files)} entries, {self.total_bytes} bytes, "
+              f"{self.workers} workers")
+        progress = ByteProgress(self.total_bytes, self.callback)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.copy_shard, shard, progress) for shard in self.shards()]
+            for future in futures:
+                future.result()
+
+        for path, original in self.hardlinks:
+            target = os.path.join(self.destination, path)
+            if os.path.lexists(target):
+                os.unlink(target)
+            os.link(os.path.join(self.destination, original), target)
+
+        # Deepest directories first so parent mtimes are not touched afterwards
+        for path, st in reversed(self.directories):
+            self.apply_metadata(os.path.join(self.source, path),
+                                os.path.join(self.destination, path), st)
+        self.apply_metadata(self.source, self.destination, os.lstat(self.source))
+
+        self.callback(1.0)
+        return self.total_bytes
+
+
+def mount_source(source, sourcefs):
+    """Return (mountpoint, cleanup) for a configured unpack source"""
+    if sourcefs == "file" or os.path.isdir(source):
+        return source, lambda: None
+
+    mountpoint = tempfile.mkdtemp(prefix="ferret-unpack-")
+    subprocess.run(["mount", "-t", sourcefs, "-o", "loop,ro", source, mountpoint], check=True)
+
+    def cleanup():
+        subprocess.run(["umount", "-l", mountpoint], check=False)
+        os.rmdir(mountpoint)
+
+    return mountpoint, cleanup
+
+
+def unpack(entries, root, workers, shard_size, report):
+    """Extract all configured entries, reporting overall progress by bytes"""
+    count = len(entries)
+    for index, entry in enumerate(entries):
+        destination = os.path.join(root, entry.get("destination", "").lstrip("/"))
+        mountpoint, cleanup = mount_source(entry["source"], entry.get("sourcefs", "squashfs"))
+        try:
+            extractor = Extractor(
+                mountpoint, destination, workers, shard_size,
+                lambda fraction, index=index: report((index + fraction) / count),
+            )
+            extractor.run()
+        finally:
+            cleanup()
+
+
+def run():
+    """Calamares job entry point"""
+    config = libcalamares.job.configuration or {}
+    root = libcalamares.globalstorage.value("rootMountPoint")
+    if not root:
+        return ("No mount point for root partition",
+                "globalstorage does not contain a \"rootMountPoint\" key.")
+    if not os.path.isdir(root):
+        return ("Bad mount point for root partition",
+                f"rootMountPoint is \"{root}\", which does not exist.")
+
+    entries = config.get("unpack") or []
+    if not entries:
+        return ("Bad unpackfs configuration", "There is no \"unpack\" list in the configuration.")
+    for entry in entries:
+        if not os.path.exists(entry.get("source", "")):
+            return ("Bad unpackfs configuration",
+                    f"The source \"{entry.get('source')}\" does not exist.")
+
+    workers = int(config.get("workers", 0))
+    shard_size = int(config.get("shardSize", 64)) << 20
+    try:
+        unpack(entries, root, workers, shard_size, libcalamares.job.setprogress)
+    except (OSError, subprocess.CalledProcessError) as e:
+        return ("Failed to unpack the live filesystem", str(e))
+    return None
+
+
+def main():
+    """Standalone entry point used by testing/bench-unpackfs.sh"""
+    parser = argparse.ArgumentParser(description="Parallel live filesystem extraction")
+    parser.add_argument("source", help="squashfs image or directory")
+    parser.add_argument("destination", help="target directory")
+    parser.add_argument("--sourcefs", default="squashfs")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--shard-size", type=int, default=64, help="shard size in MiB")
+    args = parser.parse_args()
+
+    def report(fraction):
+        sys.stderr.write(f"\r{fraction * 100:5.1f}%")
+
+    entry = {"source": args.source, "sourcefs": args.sourcefs, "destination": ""}
+    start = time.monotonic()
+    unpack([entry], args.destination, args.workers, args.shard_size << 20, report)
+    sys.stderr.write("\n")
+    print(f"elapsed={time.monotonic() - start:.3f}")
+
+
+if __name__ == "__main__":
+    main()
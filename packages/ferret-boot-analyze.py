@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Ferret OS Boot Analyzer
+Shows the boot-to-desktop critical path and services that can be deferred
+"""
+
+import sys
+
+from ferret.bootanalyze import main
+
+if __name__ == "__main__":
+    sys.exit(main())
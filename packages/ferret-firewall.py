@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Ferret OS Firewall Compiler
+Compiles /etc/ferret/ufw-rules.conf into a single nftables transaction
+"""
+
+import sys
+
+from ferret.firewall import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Ferret OS Media Check
+Verifies the live ISO or boot medium against its chunk manifest
+"""
+
+import sys
+
+from ferret.mediacheck import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Ferret OS Preloader
+Prefetches the files of applications the user is likely to launch next
+"""
+
+import sys
+
+from ferret.preload import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,121 @@ Ferret OS Modern Welcome Application
 A sleek, professional welcome experience for new users
 """
 
+import sys
+
+# Headless provisioning (ferret-welcome --apply manifest.json) must not pay for loading GTK
+if __name__ == "__main__" and any(arg == "--apply" or arg.startswith("--apply=") for arg in sys.argv[1:]):
+    from ferret.provision import main as provision_main
+    sys.exit(provision_main(sys.argv[1:]))
+
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('WebKit2', '4.0')
 
-from gi.repository import Gtk, Gdk, GdkPixbuf, Gio, WebKit2
+from gi.repository import Gtk, Gdk, GdkPixbuf, Gio, GLib, Pango, WebKit2
+import json
 import os
 import subprocess
-import json
+import queue
 import threading
+import time
 import webbrowser
 
+from ferret.bootanalyze import analyze as analyze_boot, record_first_frame
+from ferret.catalog import FEATURED, SearchIndex, load_catalog
+from ferret.diskusage import DiskUsage, format_size, largest as largest_directories
+from ferret.frametiming import DEFAULT_REFRESH_US, EffectsPolicy, dropped_ratio, frame_stats
+from ferret.hwprobe import HardwareProbe
+from ferret.launcher import ActionLauncher
+from ferret.metrics import Metrics, StallMonitor, start_server
+from ferret.updates import UpdateChecker, describe as describe_updates
+
+class CatalogList(Gtk.Box):
+    """List that only creates widgets for the rows on screen.
+    
+    A fixed pool of rows is rebound to different items as the adjustment
+    moves, so the widget count depends on the window height, not on how
+    many items the list holds."""
+    
+    def __init__(self, create_row, bind_row, row_height=64):
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+        self.items = []
+        self.rows = []
+        
+        self.adjustment = Gtk.Adjustment(0, 0, 0, row_height, row_height * 4, 0)
+        self.adjustment.connect("value-changed", lambda adjustment: self.refresh())
+        
+        # The viewport only scrolls within the first row; whole rows are rebound
+        self.viewport = Gtk.ScrolledWindow()
+        self.viewport.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.EXTERNAL)
+        self.rows_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.viewport.add(self.rows_box)
+        self.viewport.connect("size-allocate", self.on_size_allocate)
+        self.viewport.connect("scroll-event", self.on_scroll)
+        self.pack_start(self.viewport, True, True, 0)
+        
+        self.pack_start(Gtk.Scrollbar(orientation=Gtk.Orientation.VERTICAL, adjustment=self.adjustment),
+                        False, False, 0)
+    
+    def set_items(self, items):
+        """Show a new sequence of items from the top"""
+        self.items = items
+        self.adjustment.set_upper(len(items) * self.row_height)
+        self.adjustment.set_value(0)
+        self.refresh()
+    
+    def on_size_allocate(self, widget, allocation):
+        needed = allocation.height // self.row_height + 2
+        while len(self.rows) < needed:
+            row = self.create_row()
+            row.set_size_request(-1, self.row_height)
+            self.rows_box.pack_start(row, False, False, 0)
+            row.show_all()
+            self.rows.append(row)
+        self.adjustment.set_page_size(allocation.height)
+        GLib.idle_add(self.refresh)
+    
+    def on_scroll(self, widget, event):
+        if event.direction == Gdk.ScrollDirection.SMOOTH:
+            delta = event.get_scroll_deltas()[2] * self.row_height
+        elif event.direction == Gdk.ScrollDirection.UP:
+            delta = -self.row_height
+        elif event.direction == Gdk.ScrollDirection.DOWN:
+            delta = self.row_height
+        else:
+            return False
+        upper = max(0, self.adjustment.get_upper() - self.adjustment.get_page_size())
+        self.adjustment.set_value(min(upper, max(0, self.adjustment.get_value() + delta)))
+        return True
+    
+    def refresh(self):
+        """Bind the pooled rows to the items currently in view"""
+        value = self.adjustment.get_value()
+        first = int(value // self.row_height)
+        for i, row in enumerate(self.rows):
+            index = first + i
+            if index < len(self.items):
+                self.bind_row(row, self.items[index])
+                row.set_child_visible(True)
+            else:
+                row.set_child_visible(False)
+        self.viewport.get_vadjustment().set_value(value % self.row_height)
+        return False
+
 class ModernWelcomeApp:
     def __init__(self):
         self.builder = Gtk.Builder()
+        self.metrics = Metrics()
+        self.launcher = ActionLauncher(glib=True)
+        self.metrics.add_source("launcher", self.launcher.summary)
+        self.effects = EffectsPolicy()
+        self.transition_frames = None
+        self.frame_benchmark = None
+        self.install_queue = queue.Queue()
+        threading.Thread(target=self.install_worker, daemon=True).start()
         self.setup_ui()
         self.setup_css()
         
@@ -47,19 +148,20 @@ class ModernWelcomeApp:
         
         # Content area
         self.content_stack = Gtk.Stack()
-        self.content_stack.set_transition_type(Gtk.StackTransitionType.SLIDE_LEFT_RIGHT)
         self.content_stack.set_transition_duration(300)
+        self.content_stack.connect("notify::transition-running", self.on_transition_running)
         
         # Add pages
-        self.add_welcome_page()
-        self.add_system_page()
-        self.add_software_page()
-        self.add_support_page()
+        for name, add_page in (("welcome", self.add_welcome_page), ("system", self.add_system_page),
+                               ("software", self.add_software_page), ("support", self.add_support_page)):
+            with self.metrics.timer(f"page_build.{name}"):
+                add_page()
         
         main_box.pack_start(self.content_stack, True, True, 0)
         
         self.window.add(main_box)
         self.window.connect("destroy", Gtk.main_quit)
+        self.apply_effects()
         
     def setup_css(self):
         """Apply modern CSS styling"""
@@ -154,6 +256,24 @@ class ModernWelcomeApp:
         .secondary-button:hover {
             background: #cbd5e1;
         }
+        
+        .reduced-effects .feature-card,
+        .reduced-effects .feature-card:hover {
+            box-shadow: none;
+            transition: none;
+        }
+        
+        .reduced-effects .sidebar-item {
+            background: #1e293b;
+        }
+        
+        .reduced-effects .sidebar-item:hover {
+            background: #334155;
+        }
+        
+        .reduced-effects .sidebar-item.active {
+            background: #3b82f6;
+        }
         """
         
         css_provider.load_from_data(css.encode())
@@ -163,6 +283,49 @@ class ModernWelcomeApp:
             Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
     
+    def apply_effects(self):
+        """Switch to instant transitions and opaque styling when effects are reduced"""
+        if self.effects.animate:
+            self.content_stack.set_transition_type(Gtk.StackTransitionType.SLIDE_LEFT_RIGHT)
+        else:
+            self.content_stack.set_transition_type(Gtk.StackTransitionType.NONE)
+            Gtk.Settings.get_default().set_property("gtk-enable-animations", False)
+        
+        if self.effects.opaque:
+            self.window.get_style_context().add_class("reduced-effects")
+        else:
+            self.window.get_style_context().remove_class("reduced-effects")
+    
+    def on_after_paint(self, frame_clock):
+        """Collect frame times while a page transition is running"""
+        if self.transition_frames is not None:
+            self.transition_frames.append(frame_clock.get_frame_time())
+    
+    def on_transition_running(self, stack, pspec):
+        """Count dropped frames once a transition ends and degrade if they keep dropping"""
+        if stack.get_transition_running():
+            self.transition_frames = []
+            return
+        frames, self.transition_frames = self.transition_frames, None
+        if not frames:
+            return
+        
+        frame_clock = self.window.get_frame_clock()
+        try:
+            refresh_us = frame_clock.get_refresh_info(frame_clock.get_frame_time())[0]
+        except:
+            refresh_us = DEFAULT_REFRESH_US
+        intervals = [b - a for a, b in zip(frames, frames[1:])]
+        stats = frame_stats(intervals, refresh_us)
+        self.metrics.count("frames.transitions")
+        self.metrics.count("frames.dropped", stats.dropped)
+        self.metrics.observe("frames.transition_max", stats.max_ms / 1000)
+        
+        if self.frame_benchmark is not None:
+            self.frame_benchmark.append((intervals, refresh_us, stats))
+        elif self.effects.record(stats):
+            self.apply_effects()
+    
     def create_sidebar(self):
         """Create the modern sidebar navigation"""
         sidebar = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -331,7 +494,14 @@ class ModernWelcomeApp:
         info_grid.set_column_spacing(24)
         info_grid.set_row_spacing(16)
         
+        self.hardware_probe = HardwareProbe()
+        with self.metrics.timer("system_info.hardware_probe"):
+            recommendations = self.hardware_probe.probe()
+        
         system_info = self.get_system_info()
+        graphics = self.hardware_probe.graphics_summary()
+        if graphics:
+            system_info['Graphics'] = graphics
         
         for i, (label, value) in enumerate(system_info.items()):
             label_widget = Gtk.Label(f"{label}:")
@@ -347,6 +517,102 @@ class ModernWelcomeApp:
         
         page.pack_start(info_grid, False, False, 0)
         
+        # Storage: free space now, largest folders once the background scan reports
+        storage_title = Gtk.Label()
+        storage_title.set_markup('<span size="16000" weight="bold" color="#475569">Storage</span>')
+        storage_title.set_halign(Gtk.Align.START)
+        storage_title.set_margin_top(32)
+        storage_title.set_margin_bottom(12)
+        page.pack_start(storage_title, False, False, 0)
+        
+        free_space, devices = [], set()
+        for label, path in (("System", "/"), ("Home", os.path.expanduser("~"))):
+            try:
+                device = os.stat(path).st_dev
+                st = os.statvfs(path)
+            except OSError:
+                continue
+            # A home on the root filesystem is already covered by the System entry
+            if device not in devices:
+                devices.add(device)
+                free_space.append(f"{label}: {format_size(st.f_bavail * st.f_frsize)} free "
+                                  f"of {format_size(st.f_blocks * st.f_frsize)}")
+        storage_label = Gtk.Label("    ".join(free_space))
+        storage_label.set_halign(Gtk.Align.START)
+        page.pack_start(storage_label, False, False, 0)
+        
+        storage_status_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        storage_status_row.set_spacing(16)
+        storage_status_row.set_margin_top(8)
+        self.storage_status = Gtk.Label("Looking for large folders...")
+        self.storage_status.set_halign(Gtk.Align.START)
+        storage_status_row.pack_start(self.storage_status, True, True, 0)
+        self.storage_button = Gtk.Button("Cancel")
+        self.storage_button.get_style_context().add_class("secondary-button")
+        self.storage_button.connect("clicked", self.on_storage_button)
+        storage_status_row.pack_start(self.storage_button, False, False, 0)
+        page.pack_start(storage_status_row, False, False, 0)
+        
+        self.storage_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.storage_box.set_spacing(4)
+        self.storage_box.set_margin_top(8)
+        page.pack_start(self.storage_box, False, False, 0)
+        
+        self.disk_usage = DiskUsage()
+        self.storage_cancel = None
+        
+        # Pending updates: last known counts now, fresh ones after the first frame
+        updates_title = Gtk.Label()
+        updates_title.set_markup('<span size="16000" weight="bold" color="#475569">Updates</span>')
+        updates_title.set_halign(Gtk.Align.START)
+        updates_title.set_margin_top(32)
+        updates_title.set_margin_bottom(12)
+        page.pack_start(updates_title, False, False, 0)
+        
+        self.update_checker = UpdateChecker()
+        self.updates_label = Gtk.Label(describe_updates(self.update_checker.cached()))
+        self.updates_label.set_halign(Gtk.Align.START)
+        page.pack_start(self.updates_label, False, False, 0)
+        
+        # Hardware-specific drivers that are not installed yet
+        missing = [r for r in recommendations if not r.installed]
+        if missing:
+            drivers_title = Gtk.Label()
+            drivers_title.set_markup('<span size="16000" weight="bold" color="#475569">Recommended Drivers</span>')
+            drivers_title.set_halign(Gtk.Align.START)
+            drivers_title.set_margin_top(32)
+            drivers_title.set_margin_bottom(12)
+            page.pack_start(drivers_title, False, False, 0)
+            
+            for recommendation in missing:
+                row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+                row.set_spacing(16)
+                row.set_margin_bottom(8)
+                
+                driver_label = Gtk.Label(recommendation.title)
+                driver_label.set_halign(Gtk.Align.START)
+                row.pack_start(driver_label, True, True, 0)
+                
+                enable_button = Gtk.Button("Enable")
+                enable_button.get_style_context().add_class("action-button")
+                enable_button.connect("clicked", self.on_enable_driver, recommendation)
+                row.pack_start(enable_button, False, False, 0)
+                
+                page.pack_start(row, False, False, 0)
+        
+        # Boot critical path, filled in once the first frame is on screen
+        boot_title = Gtk.Label()
+        boot_title.set_markup('<span size="16000" weight="bold" color="#475569">Boot Performance</span>')
+        boot_title.set_halign(Gtk.Align.START)
+        boot_title.set_margin_top(32)
+        boot_title.set_margin_bottom(12)
+        page.pack_start(boot_title, False, False, 0)
+        
+        self.boot_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.boot_box.set_spacing(8)
+        self.boot_box.pack_start(Gtk.Label("Analyzing boot...", halign=Gtk.Align.START), False, False, 0)
+        page.pack_start(self.boot_box, False, False, 0)
+        
         self.content_stack.add_named(page, "system")
     
     def add_software_page(self):
@@ -360,39 +626,72 @@ class ModernWelcomeApp:
         title.set_margin_bottom(24)
         page.pack_start(title, False, False, 0)
         
-        # Software categories
-        categories = [
-            ("Productivity", ["LibreOffice", "GIMP", "Thunderbird"]),
-            ("Development", ["Visual Studio Code", "Git", "Docker"]),
-            ("Media", ["VLC", "Audacity", "Blender"]),
-            ("Internet", ["Firefox", "Chrome", "Telegram"])
-        ]
+        search_entry = Gtk.SearchEntry()
+        search_entry.set_placeholder_text("Search applications, categories and keywords")
+        search_entry.set_margin_bottom(16)
+        search_entry.connect("search-changed", self.on_catalog_search)
+        page.pack_start(search_entry, False, False, 0)
+        self.catalog_search = search_entry
         
-        for category, apps in categories:
-            category_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-            category_box.set_margin_bottom(32)
-            
-            category_label = Gtk.Label()
-            category_label.set_markup(f'<span size="16000" weight="bold" color="#475569">{category}</span>')
-            category_label.set_halign(Gtk.Align.START)
-            category_label.set_margin_bottom(12)
-            category_box.pack_start(category_label, False, False, 0)
-            
-            apps_grid = Gtk.FlowBox()
-            apps_grid.set_max_children_per_line(4)
-            apps_grid.set_selection_mode(Gtk.SelectionMode.NONE)
-            
-            for app in apps:
-                app_button = Gtk.Button(f"Install {app}")
-                app_button.get_style_context().add_class("secondary-button")
-                app_button.connect("clicked", self.on_install_app, app)
-                apps_grid.add(app_button)
-            
-            category_box.pack_start(apps_grid, False, False, 0)
-            page.pack_start(category_box, False, False, 0)
+        # Featured apps are searchable at once; the full catalog replaces them when loaded
+        self.install_state = {}
+        self.catalog_index = SearchIndex(FEATURED)
+        self.catalog_list = CatalogList(self.create_catalog_row, self.bind_catalog_row)
+        self.catalog_list.set_items(self.catalog_index.all)
+        page.pack_start(self.catalog_list, True, True, 0)
+        
+        def load_thread():
+            index = SearchIndex(load_catalog())
+            GLib.idle_add(self.on_catalog_loaded, index)
+        
+        threading.Thread(target=load_thread, daemon=True).start()
         
         self.content_stack.add_named(page, "software")
     
+    def create_catalog_row(self):
+        """Create one reusable software row"""
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        row.set_spacing(16)
+        
+        text_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        text_box.set_valign(Gtk.Align.CENTER)
+        row.name_label = Gtk.Label(halign=Gtk.Align.START)
+        row.summary_label = Gtk.Label(halign=Gtk.Align.START)
+        row.summary_label.set_ellipsize(Pango.EllipsizeMode.END)
+        text_box.pack_start(row.name_label, False, False, 0)
+        text_box.pack_start(row.summary_label, False, False, 0)
+        row.pack_start(text_box, True, True, 0)
+        
+        row.button = Gtk.Button()
+        row.button.set_valign(Gtk.Align.CENTER)
+        row.button.get_style_context().add_class("secondary-button")
+        row.button.connect("clicked", lambda button: self.on_install_app(button, row.entry))
+        row.pack_start(row.button, False, False, 0)
+        return row
+    
+    def bind_catalog_row(self, row, position):
+        """Show a catalog entry in a pooled row"""
+        entry = self.catalog_index.entries[position]
+        row.entry = entry
+        name = GLib.markup_escape_text(entry.name)
+        row.name_label.set_markup(f'<span weight="bold" color="#1e293b">{name}</span>')
+        summary = " · ".join(part for part in (entry.category, entry.summary) if part)
+        row.summary_label.set_markup(f'<span color="#64748b">{GLib.markup_escape_text(summary)}</span>')
+        
+        state = self.install_state.get(entry.id)
+        row.button.set_label({"installing": "Installing...", "installed": "Installed"}.get(state, "Install"))
+        row.button.set_sensitive(state is None)
+    
+    def on_catalog_search(self, entry):
+        """Filter the catalog as the user types"""
+        self.catalog_list.set_items(self.catalog_index.search(entry.get_text()))
+    
+    def on_catalog_loaded(self, index):
+        """Swap in the full catalog, keeping the current search"""
+        self.catalog_index = index
+        self.on_catalog_search(self.catalog_search)
+        return False
+    
     def add_support_page(self):
         """Create the support and resources page"""
         page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -451,19 +750,19 @@ class ModernWelcomeApp:
         
         try:
             # OS information
-            with open('/etc/os-release', 'r') as f:
+            with self.metrics.timer("system_info.os_release"), open('/etc/os-release', 'r') as f:
                 for line in f:
                     if line.startswith('PRETTY_NAME='):
                         info['Operating System'] = line.split('=')[1].strip().strip('"')
                         break
             
             # Kernel version
-            with open('/proc/version', 'r') as f:
+            with self.metrics.timer("system_info.kernel"), open('/proc/version', 'r') as f:
                 kernel_info = f.read().split()[2]
                 info['Kernel'] = kernel_info
             
             # Memory information
-            with open('/proc/meminfo', 'r') as f:
+            with self.metrics.timer("system_info.memory"), open('/proc/meminfo', 'r') as f:
                 for line in f:
                     if line.startswith('MemTotal:'):
                         mem_kb = int(line.split()[1])
@@ -472,7 +771,7 @@ class ModernWelcomeApp:
                         break
             
             # CPU information
-            with open('/proc/cpuinfo', 'r') as f:
+            with self.metrics.timer("system_info.cpu"), open('/proc/cpuinfo', 'r') as f:
                 for line in f:
                     if line.startswith('model name'):
                         info['Processor'] = line.split(':')[1].strip()
@@ -496,13 +795,11 @@ class ModernWelcomeApp:
     
     def on_install_clicked(self, button):
         """Launch the system installer"""
-        try:
-            subprocess.Popen(['pkexec', 'calamares'])
-        except Exception as e:
+        if self.launcher.launch('installer') is None:
             dialog = Gtk.MessageDialog(
                 self.window, 0, Gtk.MessageType.ERROR,
                 Gtk.ButtonsType.OK,
-                f"Could not launch installer: {e}"
+                "Could not launch installer: calamares is not installed"
             )
             dialog.run()
             dialog.destroy()
@@ -512,22 +809,181 @@ class ModernWelcomeApp:
         # Switch to system page for now
         self.content_stack.set_visible_child_name("system")
     
-    def on_install_app(self, button, app_name):
+    def on_install_app(self, button, entry):
         """Install application"""
+        self.install_state[entry.id] = "installing"
+        self.catalog_list.refresh()
+        
+        if entry.backend == "apt":
+            command = ['pkexec', 'apt-get', 'install', '-y', entry.id]
+        else:
+            command = ['flatpak', 'install', '-y', '--noninteractive', 'flathub', entry.id]
+        
+        def done(installed):
+            if installed:
+                self.install_state[entry.id] = "installed"
+            else:
+                self.install_state.pop(entry.id, None)
+            # Rows are recycled, so redraw from state rather than touching the button
+            GLib.idle_add(self.catalog_list.refresh)
+        
+        self.queue_install(command, done)
+    
+    def on_enable_driver(self, button, recommendation):
+        """Install the packages for a recommended driver"""
         button.set_sensitive(False)
-        button.set_label(f"Installing {app_name}...")
+        button.set_label("Installing...")
         
-        def install_thread():
+        def done(installed):
+            if installed:
+                GLib.idle_add(button.set_label, "Enabled")
+            else:
+                GLib.idle_add(button.set_label, "Enable")
+                GLib.idle_add(button.set_sensitive, True)
+        
+        self.queue_install(['pkexec', 'apt-get', 'install', '-y'] + recommendation.packages, done)
+    
+    def queue_install(self, command, on_done):
+        """Queue an install; they run one at a time since apt and flatpak hold locks"""
+        self.metrics.count("install.queued")
+        self.install_queue.put((command, on_done, time.perf_counter()))
+    
+    def install_worker(self):
+        """Run queued installs and report each result from this thread"""
+        while True:
+            command, on_done, queued = self.install_queue.get()
+            started = time.perf_counter()
+            self.metrics.observe("install.wait", started - queued)
             try:
-                # This would typically install via flatpak or apt
-                subprocess.run(['flatpak', 'install', '-y', app_name.lower()], 
-                             capture_output=True, text=True)
-                button.set_label(f"{app_name} Installed")
+                installed = subprocess.run(command, capture_output=True, text=True).returncode == 0
             except:
-                button.set_label(f"Install {app_name}")
-                button.set_sensitive(True)
+                installed = False
+            self.metrics.observe("install.run", time.perf_counter() - started)
+            self.metrics.count("install.succeeded" if installed else "install.failed")
+            on_done(installed)
+    
+    def on_first_draw(self, widget, cr):
+        """Record the first frame for the boot analyzer, then analyze the boot"""
+        widget.disconnect(self.first_draw_handler)
+        # Only the copy started with the session measures boot-to-desktop time
+        if "--autostart" in sys.argv[1:]:
+            record_first_frame()
+        
+        def analyze_thread():
+            try:
+                report = analyze_boot()
+            except:
+                report = None
+            GLib.idle_add(self.show_boot_report, report)
         
-        threading.Thread(target=install_thread, daemon=True).start()
+        threading.Thread(target=analyze_thread, daemon=True).start()
+        self.update_checker.check_async(
+            lambda summary: GLib.idle_add(self.updates_label.set_text, describe_updates(summary))
+        )
+        self.start_storage_scan()
+        return False
+    
+    def start_storage_scan(self):
+        """Show the saved folder sizes, then refresh them in the background"""
+        cancel = self.storage_cancel = threading.Event()
+        self.storage_button.set_label("Cancel")
+        
+        def scan_thread():
+            cached = self.disk_usage.cached()
+            if cached is not None:
+                GLib.idle_add(self.show_storage, largest_directories(cached), "Refreshing folder sizes...")
+            
+            # Partial sizes only help on the first scan; later ones show the saved sizes meanwhile
+            def progress(folders, files):
+                GLib.idle_add(self.show_storage, folders, f"Scanning... {files:,} files so far")
+            
+            with self.metrics.timer("storage.scan"):
+                result = self.disk_usage.scan(cancel, progress if cached is None else None)
+            if result is None:
+                GLib.idle_add(self.finish_storage_scan, "Scan cancelled")
+                return
+            kind = "checked" if result.incremental else "scanned"
+            GLib.idle_add(self.show_storage, largest_directories(result), None)
+            GLib.idle_add(self.finish_storage_scan, f"{result.files:,} files {kind} in {result.elapsed:.1f} s")
+        
+        threading.Thread(target=scan_thread, daemon=True).start()
+    
+    def finish_storage_scan(self, status):
+        """Scan done or cancelled: offer a rescan"""
+        self.storage_cancel = None
+        self.storage_status.set_text(status)
+        self.storage_button.set_label("Rescan")
+        return False
+    
+    def on_storage_button(self, button):
+        """Cancel a running scan, or start a new one"""
+        if self.storage_cancel is not None:
+            self.storage_cancel.set()
+        else:
+            self.start_storage_scan()
+    
+    def show_storage(self, folders, status):
+        """List the largest folders with a bar relative to the biggest one"""
+        if status:
+            self.storage_status.set_text(status)
+        for child in self.storage_box.get_children():
+            self.storage_box.remove(child)
+        
+        home = os.path.expanduser("~")
+        biggest = folders[0][1] if folders else 0
+        for path, size in folders:
+            row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+            row.set_spacing(16)
+            
+            if path == home or path.startswith(home + "/"):
+                path = "~" + path[len(home):]
+            path_label = Gtk.Label(path)
+            path_label.set_halign(Gtk.Align.START)
+            path_label.set_ellipsize(Pango.EllipsizeMode.MIDDLE)
+            path_label.set_size_request(280, -1)
+            path_label.set_xalign(0)
+            row.pack_start(path_label, False, False, 0)
+            
+            bar = Gtk.LevelBar()
+            bar.set_value(size / biggest if biggest else 0)
+            bar.set_valign(Gtk.Align.CENTER)
+            row.pack_start(bar, True, True, 0)
+            
+            size_label = Gtk.Label(format_size(size))
+            size_label.set_size_request(80, -1)
+            size_label.set_xalign(1)
+            row.pack_start(size_label, False, False, 0)
+            
+            self.storage_box.pack_start(row, False, False, 0)
+        self.storage_box.show_all()
+        return False
+    
+    def show_boot_report(self, report):
+        """Fill the Boot Performance section of the system page"""
+        for child in self.boot_box.get_children():
+            self.boot_box.remove(child)
+        
+        lines = []
+        if report is None or report.desktop_ready() is None:
+            lines.append("Boot timing is not available")
+        else:
+            phases = ", ".join(f"{name} {value:.1f} s" for name, value in report.phases().items())
+            lines.append(f"Desktop ready after {report.desktop_ready():.1f} s" + (f" ({phases})" if phases else ""))
+            slowest = ", ".join(f"{step.name} {step.duration / 1000000:.1f} s"
+                                for step in report.slowest() if step.duration)
+            if slowest:
+                lines.append(f"Slowest on the critical path: {slowest}")
+            for unit, on_path, duration, advice in report.flagged:
+                lines.append(f"{unit} ({duration:.1f} s): {advice}")
+        
+        for line in lines:
+            label = Gtk.Label(line)
+            label.set_halign(Gtk.Align.START)
+            label.set_line_wrap(True)
+            label.set_xalign(0)
+            self.boot_box.pack_start(label, False, False, 0)
+        self.boot_box.show_all()
+        return False
     
     def on_open_url(self, button, url):
         """Open URL in default browser"""
@@ -535,14 +991,63 @@ class ModernWelcomeApp:
     
     def run(self):
         """Start the application"""
+        self.first_draw_handler = self.window.connect("draw", self.on_first_draw)
+        self.metrics_server = start_server(self.metrics)
+        stall_monitor = StallMonitor(self.metrics)
+        GLib.timeout_add(int(stall_monitor.interval * 1000), stall_monitor.beat)
         self.window.show_all()
+        self.window.get_frame_clock().connect("after-paint", self.on_after_paint)
         # Set welcome page as active initially
         self.content_stack.set_visible_child_name("welcome")
         Gtk.main()
+    
+    def run_frame_benchmark(self, cycles=5):
+        """Cycle through the pages with animations on and print frame statistics as JSON"""
+        self.frame_benchmark = []
+        # Measure the full effects even where the policy would reduce them
+        Gtk.Settings.get_default().set_property("gtk-enable-animations", True)
+        self.content_stack.set_transition_type(Gtk.StackTransitionType.SLIDE_LEFT_RIGHT)
+        self.window.get_style_context().remove_class("reduced-effects")
+        pages = ["system", "software", "support", "welcome"] * cycles
+        
+        def step():
+            if pages:
+                self.content_stack.set_visible_child_name(pages.pop(0))
+                return True
+            self.report_frame_benchmark()
+            Gtk.main_quit()
+            return False
+        
+        # Leave room for each transition to finish before starting the next
+        GLib.timeout_add(self.content_stack.get_transition_duration() + 200, step)
+        self.run()
+    
+    def report_frame_benchmark(self):
+        """Print the benchmark summary and what the adaptive policy would decide"""
+        intervals = [interval for run, _, _ in self.frame_benchmark for interval in run]
+        refresh_us = self.frame_benchmark[0][1] if self.frame_benchmark else DEFAULT_REFRESH_US
+        stats = frame_stats(intervals, refresh_us)
+        policy = EffectsPolicy()
+        would_degrade = any(policy.record(run_stats) for _, _, run_stats in self.frame_benchmark)
+        print(json.dumps({
+            "transitions": len(self.frame_benchmark),
+            "refresh_ms": round(refresh_us / 1000, 2),
+            "frames": stats.frames,
+            "dropped": stats.dropped,
+            "dropped_ratio": round(dropped_ratio(stats), 3),
+            "p50_ms": round(stats.p50_ms, 2),
+            "p95_ms": round(stats.p95_ms, 2),
+            "max_ms": round(stats.max_ms, 2),
+            "reduced_effects": policy.reasons,
+            "degrades": would_degrade or not policy.animate,
+        }))
 
 def main():
     app = ModernWelcomeApp()
-    app.run()
+    if "--frame-benchmark" in sys.argv[1:]:
+        app.run_frame_benchmark()
+    else:
+        app.run()
 
 if __name__ == "__main__":
     main()
@@ -559,9 +1064,18 @@ import os
 import sys
 from pathlib import Path
 
+from ferret.launcher import ActionLauncher
+from ferret.metrics import Metrics, StallMonitor, start_server
+from ferret.updates import UpdateChecker, describe as describe_updates
+
 class FerretWelcome:
     def __init__(self):
         self.root = tk.Tk()
+        self.metrics = Metrics()
+        self.launcher = ActionLauncher()
+        self.metrics.add_source("launcher", self.launcher.summary)
+        self.update_checker = UpdateChecker()
+        self.update_summary = self.update_checker.cached()
         self.setup_window()
         self.create_widgets()
         
@@ -641,16 +1155,20 @@ class FerretWelcome:
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
         # Welcome tab
-        self.create_welcome_tab()
+        with self.metrics.timer("page_build.welcome"):
+            self.create_welcome_tab()
         
         # Getting Started tab
-        self.create_getting_started_tab()
+        with self.metrics.timer("page_build.getting_started"):
+            self.create_getting_started_tab()
         
         # Features tab
-        self.create_features_tab()
+        with self.metrics.timer("page_build.features"):
+            self.create_features_tab()
         
         # Support tab
-        self.create_support_tab()
+        with self.metrics.timer("page_build.support"):
+            self.create_support_tab()
         
     def create_welcome_tab(self):
         """Create the welcome tab"""
@@ -728,8 +1246,10 @@ Ferret OS provides all the tools you need in a polished, reliable package.
         # Action buttons
         self.create_action_button(actions_frame, "🌐 Connect to Internet", 
                                 "Open network settings", self.open_network_settings, 0, 0)
-        self.create_action_button(actions_frame, "🔄 Update System", 
-                                "Check for updates", self.update_system, 0, 1)
+        cached = self.update_summary
+        self.update_subtitle = self.create_action_button(
+            actions_frame, "🔄 Update System",
+            describe_updates(cached) if cached else "Check for updates", self.update_system, 0, 1)
         self.create_action_button(actions_frame, "📱 Install Apps", 
                                 "Browse app store", self.open_app_store, 0, 2)
         self.create_action_button(actions_frame, "⚙️ System Settings", 
@@ -772,6 +1292,7 @@ Ferret OS provides all the tools you need in a polished, reliable package.
         subtitle_label = ttk.Label(button_frame, text=subtitle, 
                                  font=('Inter', 9), foreground='#64748b')
         subtitle_label.pack(padx=10, pady=(0, 10))
+        return subtitle_label
         
     def create_features_tab(self):
         """Create the features tab"""
@@ -917,44 +1438,51 @@ HARDWARE SUPPORT
     # Action methods
     def open_network_settings(self):
         """Open network configuration"""
-        try:
-            subprocess.Popen(['nm-connection-editor'])
-        except:
-            subprocess.Popen(['xfce4-settings-manager'])
+        self.launcher.launch('network')
     
     def update_system(self):
         """Launch system updater"""
-        try:
-            subprocess.Popen(['gnome-software', '--mode=updates'])
-        except:
-            subprocess.Popen(['xfce4-terminal', '-e', 'sudo apt update && sudo apt upgrade'])
+        self.launcher.launch('updates')
+    
+    def refresh_updates(self):
+        """Check for updates in the background and show the counts when ready"""
+        def store(summary):
+            self.update_summary = summary
+        
+        thread = self.update_checker.check_async(store)
+        
+        def poll():
+            # Tk is not thread-safe, so the label is only touched from here
+            if self.update_summary:
+                self.update_subtitle.config(text=describe_updates(self.update_summary))
+            if thread.is_alive():
+                self.root.after(500, poll)
+        
+        self.root.after(500, poll)
     
     def open_app_store(self):
         """Open application store"""
-        try:
-            subprocess.Popen(['gnome-software'])
-        except:
-            subprocess.Popen(['synaptic'])
+        self.launcher.launch('app-store')
     
     def open_settings(self):
         """Open system settings"""
-        subprocess.Popen(['xfce4-settings-manager'])
+        self.launcher.launch('settings')
     
     def open_file_manager(self):
         """Open file manager"""
-        subprocess.Popen(['thunar'])
+        self.launcher.launch('file-manager')
     
     def open_terminal(self):
         """Open terminal"""
-        subprocess.Popen(['xfce4-terminal'])
+        self.launcher.launch('terminal')
     
     def open_manual(self):
         """Open manual pages"""
-        subprocess.Popen(['xfce4-terminal', '-e', 'man intro'])
+        self.launcher.launch('manual')
     
     def open_help_search(self):
         """Open help search"""
-        subprocess.Popen(['yelp'])
+        self.launcher.launch('help')
     
     def show_system_info(self):
         """Show system information"""
@@ -972,9 +1500,7 @@ HARDWARE SUPPORT
     
     def launch_installer(self):
         """Launch the system installer"""
-        try:
-            subprocess.Popen(['calamares'])
-        except:
+        if self.launcher.launch('installer') is None:
             messagebox.showerror("Error", "System installer not found")
     
     def is_live_session(self):
@@ -992,7 +1518,7 @@ HARDWARE SUPPORT
             autostart_content = """[Desktop Entry]
 Type=Application
 Name=Ferret Welcome
-Exec=ferret-welcome
+Exec=ferret-welcome --autostart
 Hidden=false
 NoDisplay=false
 X-GNOME-Autostart-enabled=true
@@ -1009,7 +1535,15 @@ X-GNOME-Autostart-enabled=true
     
     def run(self):
         """Start the application"""
+        self.root.after_idle(self.refresh_updates)
+        self.metrics_server = start_server(self.metrics)
+        self.watch_main_loop(StallMonitor(self.metrics))
         self.root.mainloop()
+    
+    def watch_main_loop(self, monitor):
+        """Heartbeat for the stall monitor, rescheduled from the Tk loop itself"""
+        monitor.beat()
+        self.root.after(int(monitor.interval * 1000), self.watch_main_loop, monitor)
 
 def main():
     """Main entry point"""
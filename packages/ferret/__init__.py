@@ -0,0 +1,4 @@
+"""
+Ferret OS support library
+Shared helpers for the welcome application and system tools
+"""
@@ -0,0 +1,321 @@
+"""
+Ferret OS boot analyzer
+Builds the boot-to-desktop critical path from systemd, journal and session timing
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+USEC = 1000000
+BOOT_TARGET = "graphical.target"
+# The user manager started at login; pulseaudio and other session services run under it
+USER_TARGET = "default.target"
+FIRST_FRAME_FILE = "ferret-welcome-first-frame"
+
+UNIT_PROPERTIES = ("Id", "After", "InactiveExitTimestampMonotonic", "ActiveEnterTimestampMonotonic")
+MANAGER_PROPERTIES = (
+    "FirmwareTimestampMonotonic", "LoaderTimestampMonotonic", "KernelTimestampMonotonic",
+    "InitRDTimestampMonotonic", "UserspaceTimestampMonotonic", "FinishTimestampMonotonic",
+)
+
+Unit = namedtuple("Unit", "name activating active after")
+Step = namedtuple("Step", "name at duration")
+
+# Services from docs/ARCHITECTURE.md that do not need to block boot
+DEFERRABLE = {
+    "bluetooth.service": "Start on demand: bluetoothd is pulled in by bluetooth.target when an "
+                         "adapter appears, so it can be dropped from multi-user.target.",
+    "pulseaudio.service": "Socket-activate: enable the pulseaudio.socket user unit so the daemon "
+                          "starts with the first audio client instead of at boot.",
+    "ufw.service": "Replace with ferret-firewall.service, which loads the same rules as one "
+                   "nftables transaction.",
+    "networking.service": "Redundant with NetworkManager on the desktop; ifupdown can be disabled.",
+    "NetworkManager-wait-online.service": "Only needed for network filesystems; it delays "
+                                         "network-online.target and everything after it.",
+}
+
+
+def parse_show(text):
+    """Parse blank-line separated `systemctl show` blocks into dicts"""
+    blocks, current = [], {}
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition("=")
+        current[key] = value
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _usec(block, key):
+    try:
+        return int(block.get(key) or 0)
+    except ValueError:
+        return 0
+
+
+def collect_units(run=subprocess.run, user=False):
+    """Activation timestamps and ordering dependencies for all loaded system (or user) units"""
+    systemctl = ["systemctl", "--user"] if user else ["systemctl"]
+    output = run(
+        systemctl + ["list-units", "--all", "--plain", "--no-legend", "--no-pager"],
+        capture_output=True, text=True,
+    ).stdout
+    # One unit per line, name first; descriptions may contain dots too
+    names = []
+    for line in output.splitlines():
+        fields = line.lstrip("● ").split(None, 1)
+        if fields and "." in fields[0]:
+            names.append(fields[0])
+    if not names:
+        return {}
+    output = run(
+        systemctl + ["show", "--property=" + ",".join(UNIT_PROPERTIES), "--"] + names,
+        capture_output=True, text=True,
+    ).stdout
+    units = {}
+    for block in parse_show(output):
+        name = block.get("Id")
+        if name:
+            units[name] = Unit(
+                name,
+                _usec(block, "InactiveExitTimestampMonotonic"),
+                _usec(block, "ActiveEnterTimestampMonotonic"),
+                block.get("After", "").split(),
+            )
+    return units
+
+
+def collect_manager(run=subprocess.run):
+    """Firmware/loader/kernel/initrd/userspace boundaries of the current boot"""
+    output = run(
+        ["systemctl", "show", "--property=" + ",".join(MANAGER_PROPERTIES)],
+        capture_output=True, text=True,
+    ).stdout
+    blocks = parse_show(output)
+    return {key: _usec(blocks[0], key) for key in MANAGER_PROPERTIES} if blocks else {}
+
+
+def critical_chain(units, target=BOOT_TARGET):
+    """Walk After= dependencies back from target, always following the one
+    that became active last before the unit started (like systemd-analyze
+    critical-chain), and return the chain in boot order"""
+    chain = []
+    seen = set()
+    name = target
+    while name in units and name not in seen:
+        seen.add(name)
+        unit = units[name]
+        if not unit.active:
+            break
+        start = unit.activating or unit.active
+        chain.append(Step(name, start, unit.active - start))
+
+        blocker = None
+        for dependency in unit.after:
+            candidate = units.get(dependency)
+            if not candidate or not candidate.active or candidate.active > start:
+                continue
+            if blocker is None or candidate.active > blocker.active:
+                blocker = candidate
+        if blocker is None:
+            break
+        name = blocker.name
+    chain.reverse()
+    return chain
+
+
+def _start_time(stat):
+    """Monotonic start time (usec) from the contents of /proc/<pid>/stat"""
+    return int(stat[stat.rindex(")") + 2:].split()[19]) * USEC // os.sysconf("SC_CLK_TCK")
+
+
+def _process_start(name):
+    """Monotonic start time (usec) of the oldest process with a given comm"""
+    best = None
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        comm = stat[stat.index("(") + 1:stat.rindex(")")]
+        if comm != name[:15]:
+            continue
+        start = _start_time(stat)
+        if best is None or start < best:
+            best = start
+    return best
+
+
+def _session_opened(run=subprocess.run):
+    """Monotonic time of the display manager login from the journal"""
+    output = run(
+        ["journalctl", "-b", "-o", "short-monotonic", "--no-pager", "-q",
+         "SYSLOG_IDENTIFIER=lightdm"],
+        capture_output=True, text=True,
+    ).stdout
+    for line in output.splitlines():
+        if "session opened" in line:
+            match = re.match(r"\[\s*(\d+)\.(\d+)\]", line)
+            if match:
+                return int(match.group(1)) * USEC + int(match.group(2).ljust(6, "0")[:6])
+    return None
+
+
+def first_frame_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    return os.path.join(runtime_dir, FIRST_FRAME_FILE)
+
+
+def record_first_frame():
+    """Called by the autostarted welcome app once its first frame has been drawn;
+    records when the process started and when the frame was drawn"""
+    # Only the first start after login counts; opening the app again later must not move it
+    try:
+        with open("/proc/self/stat") as f:
+            started = _start_time(f.read())
+        fd = os.open(first_frame_path(), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except OSError:
+        return
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{started} {int(time.monotonic() * USEC)}")
+
+
+def session_milestones(run=subprocess.run):
+    """Desktop session steps after graphical.target, in boot order.
+
+    The welcome app only counts when it was autostarted with the session;
+    a copy opened later would just report the current uptime."""
+    milestones = [
+        ("lightdm login", _session_opened(run)),
+        ("xfce4-session", _process_start("xfce4-session")),
+    ]
+    try:
+        with open(first_frame_path()) as f:
+            started, drawn = (int(value) for value in f.read().split())
+        milestones.append(("ferret-welcome started", started))
+        milestones.append(("ferret-welcome first frame", drawn))
+    except (OSError, ValueError):
+        pass
+    return [(name, at) for name, at in milestones if at]
+
+
+class BootReport:
+    """Everything the welcome app and the command line show about a boot"""
+
+    def __init__(self, manager, chain, milestones, flagged):
+        self.manager = manager
+        self.chain = chain
+        self.milestones = milestones
+        self.flagged = flagged
+
+    def phases(self):
+        """Kernel, initrd and userspace durations in seconds"""
+        m = self.manager
+        if not m.get("UserspaceTimestampMonotonic"):
+            return {}
+        kernel_end = m.get("InitRDTimestampMonotonic") or m.get("UserspaceTimestampMonotonic", 0)
+        phases = {"kernel": kernel_end}
+        if m.get("InitRDTimestampMonotonic"):
+            phases["initrd"] = m.get("UserspaceTimestampMonotonic", 0) - m["InitRDTimestampMonotonic"]
+        if m.get("FinishTimestampMonotonic"):
+            phases["userspace"] = m["FinishTimestampMonotonic"] - m.get("UserspaceTimestampMonotonic", 0)
+        return {name: value / USEC for name, value in phases.items()}
+
+    def desktop_ready(self):
+        """Seconds from kernel start to the last milestone of the autostarted session"""
+        times = [at for _, at in self.milestones] + [step.at + step.duration for step in self.chain]
+        return max(times) / USEC if times else None
+
+    def slowest(self, count=3):
+        return sorted(self.chain, key=lambda step: step.duration, reverse=True)[:count]
+
+    def as_dict(self):
+        return {
+            "phases": self.phases(),
+            "desktop_ready": self.desktop_ready(),
+            "critical_chain": [step._asdict() for step in self.chain],
+            "milestones": [{"name": name, "at": at} for name, at in self.milestones],
+            "flagged": [{"unit": unit, "on_critical_path": on_path, "duration": duration, "advice": advice}
+                        for unit, on_path, duration, advice in self.flagged],
+        }
+
+
+def analyze(run=subprocess.run, target=BOOT_TARGET):
+    """Collect the current boot and build a BootReport"""
+    units = collect_units(run)
+    chain = critical_chain(units, target)
+    # User units share the monotonic clock; their chain continues after login
+    user_units = collect_units(run, user=True)
+    user_chain = critical_chain(user_units, USER_TARGET)
+
+    flagged = []
+    for scope, scope_chain in ((units, chain), (user_units, user_chain)):
+        on_path = {step.name for step in scope_chain}
+        for name, advice in DEFERRABLE.items():
+            unit = scope.get(name)
+            if unit and unit.active:
+                duration = unit.active - (unit.activating or unit.active)
+                flagged.append((name, name in on_path, duration / USEC, advice))
+    chain += [step._replace(name=f"{step.name} (user)") for step in user_chain]
+
+    return BootReport(collect_manager(run), chain, session_milestones(run), flagged)
+
+
+def format_report(report):
+    lines = []
+    phases = report.phases()
+    lines.append("Boot phases: " + ", ".join(f"{name} {value:.2f}s" for name, value in phases.items()))
+    ready = report.desktop_ready()
+    if ready:
+        lines.append(f"Desktop ready after {ready:.2f}s")
+    lines.append("")
+    lines.append(f"Critical chain to {BOOT_TARGET}, the user session and the welcome app:")
+    for step in report.chain:
+        lines.append(f"  {step.at / USEC:8.3f}s  +{step.duration / USEC:6.3f}s  {step.name}")
+    for name, at in report.milestones:
+        lines.append(f"  {at / USEC:8.3f}s           {name}")
+    if report.flagged:
+        lines.append("")
+        lines.append("Services that can be deferred or socket-activated:")
+        for unit, on_path, duration, advice in report.flagged:
+            where = "critical path" if on_path else "off critical path"
+            lines.append(f"  {unit} ({duration:.2f}s, {where})")
+            lines.append(f"      {advice}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-boot-analyze",
+                                     description="Show where boot-to-desktop time goes")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    parser.add_argument("--target", default=BOOT_TARGET)
+    args = parser.parse_args(argv)
+
+    try:
+        report = analyze(target=args.target)
+    except FileNotFoundError as e:
+        print(f"ferret-boot-analyze: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
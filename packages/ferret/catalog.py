@@ -0,0 +1,183 @@
+"""
+Ferret OS software catalog
+Catalog entries from Flatpak AppStream data with a prefix/trigram search index
+"""
+
+import glob
+import gzip
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+Entry = namedtuple("Entry", "id name summary category keywords backend")
+
+FLATPAK_APPSTREAM = "/var/lib/flatpak/appstream/*/*/active/appstream.xml*"
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Always shown, even before AppStream data has been downloaded
+FEATURED = [
+    Entry("org.libreoffice.LibreOffice", "LibreOffice", "Office suite", "Productivity", ("office", "documents", "spreadsheet"), "flatpak"),
+    Entry("org.gimp.GIMP", "GIMP", "Image editor", "Productivity", ("photo", "image", "paint"), "flatpak"),
+    Entry("org.mozilla.Thunderbird", "Thunderbird", "Email client", "Productivity", ("email", "mail", "calendar"), "flatpak"),
+    Entry("com.visualstudio.code", "Visual Studio Code", "Code editor", "Development", ("editor", "ide", "code"), "flatpak"),
+    Entry("git", "Git", "Distributed version control", "Development", ("vcs", "version", "scm"), "apt"),
+    Entry("docker.io", "Docker", "Container runtime", "Development", ("containers", "oci"), "apt"),
+    Entry("org.videolan.VLC", "VLC", "Media player", "Media", ("video", "music", "player"), "flatpak"),
+    Entry("org.audacityteam.Audacity", "Audacity", "Audio editor", "Media", ("audio", "sound", "recording"), "flatpak"),
+    Entry("org.blender.Blender", "Blender", "3D creation suite", "Media", ("3d", "modeling", "animation"), "flatpak"),
+    Entry("org.mozilla.firefox", "Firefox", "Web browser", "Internet", ("browser", "web"), "flatpak"),
+    Entry("com.google.Chrome", "Chrome", "Web browser", "Internet", ("browser", "web"), "flatpak"),
+    Entry("org.telegram.desktop", "Telegram", "Messaging app", "Internet", ("chat", "messenger"), "flatpak"),
+]
+
+
+def _text(element, tag):
+    """Untranslated text of the first child with the given tag"""
+    for child in element.iterfind(tag):
+        if child.get(XML_LANG) is None:
+            return (child.text or "").strip()
+    return ""
+
+
+def load_appstream(pattern=FLATPAK_APPSTREAM):
+    """Desktop applications from the Flatpak remotes' AppStream catalogs"""
+    entries = []
+    for path in glob.glob(pattern):
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                for _, element in ET.iterparse(f):
+                    if element.tag != "component":
+                        continue
+                    if element.get("type") in ("desktop", "desktop-application"):
+                        app_id = _text(element, "id")
+                        if app_id.endswith(".desktop"):
+                            app_id = app_id[:-8]
+                        categories = [c.text for c in element.iterfind("categories/category") if c.text]
+                        keywords = tuple(k.text.lower() for k in element.iterfind("keywords/keyword")
+                                         if k.text and k.get(XML_LANG) is None)
+                        entries.append(Entry(app_id, _text(element, "name") or app_id, _text(element, "summary"),
+                                             categories[0] if categories else "", keywords, "flatpak"))
+                    element.clear()
+        except (OSError, ET.ParseError, EOFError):
+            continue
+    return entries
+
+
+def load_catalog():
+    """Featured entries first, then everything else from AppStream"""
+    seen = {entry.id for entry in FEATURED}
+    entries = list(FEATURED)
+    for entry in sorted(load_appstream(), key=lambda entry: entry.name.lower()):
+        if entry.id not in seen:
+            seen.add(entry.id)
+            entries.append(entry)
+    return entries
+
+
+def _words(entry):
+    words = set(entry.name.lower().split())
+    words.update(entry.category.lower().split())
+    words.update(entry.keywords)
+    # Flatpak ids are reverse DNS; indexing "org.gimp.GIMP" whole made "o",
+    # "org" or "com" match nearly the whole catalog, so keep its last part
+    app_id = entry.id.lower()
+    words.add(app_id.rsplit(".", 1)[-1] if entry.backend == "flatpak" else app_id)
+    return words
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Prefix and substring search over names, categories and keywords.
+
+    Postings are array('I') of entry positions, so the index costs a few
+    bytes per word occurrence rather than a Python object each."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.names = [entry.name.lower() for entry in entries]
+        self.haystacks = []
+        postings = {}
+        trigrams = {}
+        for position, entry in enumerate(entries):
+            words = _words(entry)
+            haystack = " ".join(sorted(words))
+            self.haystacks.append(haystack)
+            for word in words:
+                postings.setdefault(word, array("I")).append(position)
+            for trigram in _trigrams(haystack):
+                trigrams.setdefault(trigram, array("I")).append(position)
+
+        self.vocabulary = sorted(postings)
+        self.postings = [postings[word] for word in self.vocabulary]
+        self.trigrams = trigrams
+        self.all = array("I", range(len(entries)))
+
+    def _prefix(self, term):
+        """Entries with a word starting with term"""
+        found = set()
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            found.update(self.postings[i])
+            i += 1
+        return found
+
+    def _substring(self, term):
+        """Entries containing term anywhere, narrowed by the rarest trigram"""
+        grams = _trigrams(term)
+        if not grams:
+            return set()
+        lists = sorted((self.trigrams.get(gram, ()) for gram in grams), key=len)
+        if not lists[0]:
+            return set()
+        return {position for position in lists[0] if term in self.haystacks[position]}
+
+    def search(self, query):
+        """Matching entry positions, name-prefix matches first"""
+        terms = query.lower().split()
+        if not terms:
+            return self.all
+
+        matches = None
+        for term in terms:
+            found = self._prefix(term)
+            if len(term) >= 3:
+                found |= self._substring(term)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return array("I")
+
+        first = terms[0]
+        names = self.names
+        leading, rest = array("I"), array("I")
+        for position in sorted(matches):
+            if names[position].startswith(first):
+                leading.append(position)
+            else:
+                rest.append(position)
+        leading.extend(rest)
+        return leading
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    entries = load_catalog()
+    loaded = time.perf_counter()
+    index = SearchIndex(entries)
+    indexed = time.perf_counter()
+    print(f"{len(entries)} entries: load {(loaded - start) * 1000:.1f} ms, index {(indexed - loaded) * 1000:.1f} ms")
+
+    # Per-keystroke latency while typing a few queries
+    worst = 0.0
+    for query in ("b", "br", "bro", "brow", "browser", "vid", "video edit", "office"):
+        start = time.perf_counter()
+        results = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = max(worst, elapsed)
+        print(f"{query!r:14} {len(results):6} results {elapsed:6.2f} ms")
+    print(f"Worst keystroke: {worst:.2f} ms")
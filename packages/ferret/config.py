@@ -0,0 +1,31 @@
+"""
+Ferret OS configuration helpers
+Reads the system-wide ferret-defaults.conf installed by the build
+"""
+
+import configparser
+import os
+
+DEFAULTS_PATH = "/etc/ferret/ferret-defaults.conf"
+# Fallback when running from a source checkout
+SOURCE_DEFAULTS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "config", "ferret-defaults.conf"
+)
+
+
+def load_defaults(path=None):
+    """Load ferret-defaults.conf, keeping key case as written"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str
+    if path is None:
+        path = DEFAULTS_PATH if os.path.exists(DEFAULTS_PATH) else SOURCE_DEFAULTS_PATH
+    parser.read(path)
+    return parser
+
+
+def get_bool(config, section, key, default=False):
+    """Read a true/false setting, falling back to default on bad values"""
+    try:
+        return config.getboolean(section, key, fallback=default)
+    except ValueError:
+        return default
@@ -0,0 +1,348 @@
+"""
+Ferret OS disk usage analyzer
+Parallel directory scan into a compact array-backed tree, refreshed incrementally from an on-disk index
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ferret")
+INDEX_PATH = os.path.join(CACHE_DIR, "diskusage.idx")
+INDEX_VERSION = 2
+SYSTEM_PATHS = ("/usr", "/var", "/opt")
+# Directory mtimes miss files growing in place, so rescan everything now and then
+FULL_SCAN_AGE = 7 * 24 * 3600
+PROGRESS_INTERVAL = 0.25
+
+ScanResult = namedtuple("ScanResult", "tree totals files errors elapsed incremental")
+
+
+def default_roots():
+    return [os.path.expanduser("~")] + [path for path in SYSTEM_PATHS if os.path.isdir(path)]
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} TB"
+
+
+class DirTree:
+    """Directories only, in parallel arrays indexed by node.
+
+    A node's parent always has a lower index, so subtree totals take one
+    reverse pass. Names are bytes in a single blob (roots hold their full
+    path), which keeps a million-file home at a few MB in memory.
+
+    size/files are what this scan counted for the directory; plain and
+    plain_files leave out hard-linked files, which are kept separately as
+    (dev, inode, bytes) so a refresh can count each inode exactly once."""
+
+    ARRAYS = (("parent", "i"), ("size", "Q"), ("plain", "Q"), ("mtime", "q"), ("files", "I"),
+              ("plain_files", "I"), ("offsets", "Q"), ("link_offsets", "Q"))
+
+    def __init__(self):
+        for name, typecode in self.ARRAYS:
+            setattr(self, name, array(typecode))
+        self.offsets.append(0)
+        self.link_offsets.append(0)
+        self.blob = bytearray()
+        self.links = array("Q")
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, name, size, plain, mtime, files, plain_files, links):
+        self.parent.append(parent)
+        self.size.append(size)
+        self.plain.append(plain)
+        self.mtime.append(mtime)
+        self.files.append(files)
+        self.plain_files.append(plain_files)
+        self.blob += name
+        self.offsets.append(len(self.blob))
+        for link in links:
+            self.links.extend(link)
+        self.link_offsets.append(len(self.links))
+        return len(self.parent) - 1
+
+    def name(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+    def links_of(self, index):
+        """[(dev, inode, bytes)] of the hard-linked files in a directory"""
+        flat = self.links[self.link_offsets[index]:self.link_offsets[index + 1]]
+        return [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+
+    def path(self, index):
+        parts = []
+        while index >= 0:
+            parts.append(self.name(index))
+            index = self.parent[index]
+        return os.fsdecode(b"/".join(reversed(parts)))
+
+    def children(self):
+        """{node: [child nodes]} for the whole tree"""
+        children = {}
+        for index, parent in enumerate(self.parent):
+            if parent >= 0:
+                children.setdefault(parent, []).append(index)
+        return children
+
+    def totals(self):
+        """Bytes used by each node's whole subtree"""
+        totals = array("Q", self.size)
+        parent = self.parent
+        for index in range(len(totals) - 1, -1, -1):
+            if parent[index] >= 0:
+                totals[parent[index]] += totals[index]
+        return totals
+
+    def save(self, path, roots):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"version": INDEX_VERSION, "roots": roots, "count": len(self),
+                  "links": len(self.links), "blob": len(self.blob), "scanned": time.time()}
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for name, _ in self.ARRAYS:
+                getattr(self, name).tofile(f)
+            self.links.tofile(f)
+            f.write(self.blob)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        """(tree, header) from an index file, or (None, None) if it is missing or stale"""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != INDEX_VERSION:
+                    return None, None
+                tree = cls()
+                tree.offsets, tree.link_offsets = array("Q"), array("Q")
+                for name, typecode in cls.ARRAYS:
+                    count = header["count"] + 1 if name.endswith("offsets") else header["count"]
+                    getattr(tree, name).fromfile(f, count)
+                tree.links.fromfile(f, header["links"])
+                tree.blob = bytearray(f.read(header["blob"]))
+                if len(tree.blob) != header["blob"]:
+                    return None, None
+            return tree, header
+        except (OSError, ValueError, KeyError, EOFError):
+            return None, None
+
+
+class Scanner:
+    """Walk the roots with a pool of os.scandir threads.
+
+    With a previous tree, a directory whose mtime is unchanged keeps its
+    old size and child list and is only stat()ed, so a refresh costs one
+    stat per directory instead of one per file."""
+
+    def __init__(self, roots, old=None, workers=4, cancel=None, progress=None):
+        self.roots = roots
+        self.old = old
+        self.old_children = old.children() if old is not None else {}
+        self.workers = workers
+        self.cancel = cancel or threading.Event()
+        self.progress = progress
+        self.tree = DirTree()
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.seen_inodes = set()
+        self.files = 0
+        self.errors = 0
+        # Running bytes per top-level directory, for progressive display
+        self.top = array("i")
+        self.top_bytes = {}
+        self.last_progress = time.monotonic()
+
+    def scan_directory(self, path, dev):
+        """Disk usage and count of a directory's own unlinked files, its hard-linked files and its subdirectories"""
+        size = files = 0
+        links = []
+        subdirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    # Stay on the root's filesystem (no /proc, fuse or network mounts)
+                    if st.st_dev == dev:
+                        subdirs.append(os.fsencode(entry.name))
+                    continue
+                if st.st_nlink > 1:
+                    # Claimed in process(), where other directories' links are visible
+                    links.append((st.st_dev, st.st_ino, st.st_blocks * 512))
+                    continue
+                size += st.st_blocks * 512
+                files += 1
+        return size, files, links, subdirs
+
+    def process(self, item):
+        parent, name, path, old_index, dev = item
+        try:
+            st = os.stat(path, follow_symlinks=False)
+            if dev is None:
+                dev = st.st_dev
+            if old_index >= 0 and self.old.mtime[old_index] == st.st_mtime_ns:
+                size, files = self.old.plain[old_index], self.old.plain_files[old_index]
+                links = self.old.links_of(old_index)
+                subdirs = [(self.old.name(child), child) for child in self.old_children.get(old_index, ())]
+            else:
+                size, files, links, names = self.scan_directory(path, dev)
+                # Count the directory's own blocks too, as du does
+                size += st.st_blocks * 512
+                old_names = {self.old.name(child): child for child in self.old_children.get(old_index, ())}
+                subdirs = [(child, old_names.get(child, -1)) for child in names]
+            mtime = st.st_mtime_ns
+        except OSError:
+            size = files = mtime = 0
+            links, subdirs = [], []
+            with self.lock:
+                self.errors += 1
+
+        with self.lock:
+            # A hard-linked inode counts once, for whichever directory reaches it first
+            linked = linked_files = 0
+            for link_dev, inode, blocks in links:
+                if (link_dev, inode) not in self.seen_inodes:
+                    self.seen_inodes.add((link_dev, inode))
+                    linked += blocks
+                    linked_files += 1
+            index = self.tree.add(parent, name, size + linked, size, mtime, files + linked_files, files, links)
+            top = index if parent < 0 or self.tree.parent[parent] < 0 else self.top[parent]
+            self.top.append(top)
+            self.top_bytes[top] = self.top_bytes.get(top, 0) + size + linked
+            self.files += files + linked_files
+            report = self.progress and time.monotonic() - self.last_progress > PROGRESS_INTERVAL
+            if report:
+                self.last_progress = time.monotonic()
+
+        base = os.fsencode(path)
+        for child, old_child in subdirs:
+            self.queue.put((index, child, os.fsdecode(base + b"/" + child), old_child, dev))
+        if report:
+            self.progress(self.largest_so_far(), self.files)
+
+    def largest_so_far(self, count=8):
+        """[(path, bytes)] of the biggest top-level directories scanned so far"""
+        with self.lock:
+            ranked = sorted(self.top_bytes.items(), key=lambda item: -item[1])[:count]
+        return [(self.tree.path(index), size) for index, size in ranked]
+
+    def worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if not self.cancel.is_set():
+                    self.process(item)
+            finally:
+                self.queue.task_done()
+
+    def run(self):
+        """Scan everything; returns the new tree, or None when cancelled"""
+        old_roots = {}
+        if self.old is not None:
+            old_roots = {self.old.name(index): index for index in range(len(self.old)) if self.old.parent[index] < 0}
+        for root in self.roots:
+            name = os.fsencode(os.path.abspath(root))
+            self.queue.put((-1, name, os.fsdecode(name), old_roots.get(name, -1), None))
+
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        self.queue.join()
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+        return None if self.cancel.is_set() else self.tree
+
+
+class DiskUsage:
+    """Scan the home directory and system paths, reusing the saved index when possible"""
+
+    def __init__(self, roots=None, index_path=INDEX_PATH, workers=4):
+        self.roots = [os.path.abspath(root) for root in (roots or default_roots())]
+        self.index_path = index_path
+        self.workers = workers
+
+    def cached(self):
+        """Totals from the saved index without touching the disk, or None"""
+        tree, header = DirTree.load(self.index_path)
+        if tree is None or header["roots"] != self.roots:
+            return None
+        return ScanResult(tree, tree.totals(), sum(tree.files), 0, 0.0, True)
+
+    def scan(self, cancel=None, progress=None, full=False):
+        """Full or incremental scan; None when cancelled. progress(largest, files) runs on a worker thread"""
+        start = time.perf_counter()
+        old, header = (None, None) if full else DirTree.load(self.index_path)
+        if old is not None and (header["roots"] != self.roots or time.time() - header["scanned"] > FULL_SCAN_AGE):
+            old = None
+
+        scanner = Scanner(self.roots, old, self.workers, cancel, progress)
+        tree = scanner.run()
+        if tree is None:
+            return None
+        try:
+            tree.save(self.index_path, self.roots)
+        except OSError:
+            pass
+        return ScanResult(tree, tree.totals(), scanner.files, scanner.errors,
+                          time.perf_counter() - start, old is not None)
+
+
+def largest(result, count=8, depth=1):
+    """[(path, bytes)] of the biggest directories at most `depth` levels below a root"""
+    tree, totals = result.tree, result.totals
+    levels = array("b", bytes(len(tree)))
+    candidates = []
+    for index, parent in enumerate(tree.parent):
+        if parent >= 0:
+            levels[index] = min(127, levels[parent] + 1)
+        if levels[index] == depth:
+            candidates.append(index)
+    candidates.sort(key=lambda index: -totals[index])
+    return [(tree.path(index), totals[index]) for index in candidates[:count]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-diskusage", description="Show what uses disk space")
+    parser.add_argument("roots", nargs="*", help="directories to scan (default: home, /usr, /var, /opt)")
+    parser.add_argument("--full", action="store_true", help="ignore the saved index and rescan everything")
+    parser.add_argument("--index", default=INDEX_PATH, help="index file")
+    parser.add_argument("-j", "--workers", type=int, default=4)
+    parser.add_argument("-n", "--count", type=int, default=10, help="directories to list")
+    args = parser.parse_args(argv)
+
+    usage = DiskUsage(args.roots or None, args.index, args.workers)
+    try:
+        result = usage.scan(full=args.full)
+    except KeyboardInterrupt:
+        return 130
+    for path, size in largest(result, args.count):
+        print(f"{format_size(size):>10}  {path}")
+    print(f"{len(result.tree)} directories, {result.files} files, {format_size(sum(result.tree.size))} "
+          f"in {result.elapsed:.2f} s ({'incremental' if result.incremental else 'full'} scan"
+          f"{f', {result.errors} unreadable' if result.errors else ''})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
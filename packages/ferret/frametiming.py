@@ -0,0 +1,87 @@
+"""
+Ferret OS frame timing
+Dropped-frame accounting for UI transitions and the reduced-effects policy
+"""
+
+import glob
+import os
+from collections import namedtuple
+
+from ferret.config import get_bool, load_defaults
+from ferret.sysinfo import read_meminfo
+
+# Used when the frame clock has no refresh information (Xvfb, some X servers)
+DEFAULT_REFRESH_US = 16667
+# Below this much RAM the UI starts with reduced effects (1 GB test machines)
+LOW_MEMORY = 1536 * 1024 * 1024
+# A transition is janky when this share of its frames was dropped, and
+# this many janky transitions switch the UI to reduced effects
+DROP_RATIO = 0.2
+DEGRADE_AFTER = 2
+
+FrameStats = namedtuple("FrameStats", "frames dropped p50_ms p95_ms max_ms")
+
+
+def frame_stats(intervals, refresh_us=DEFAULT_REFRESH_US):
+    """Summarize frame-clock intervals (µs); an interval of n refresh periods drops n - 1 frames"""
+    if not intervals:
+        return FrameStats(0, 0, 0.0, 0.0, 0.0)
+    refresh_us = refresh_us or DEFAULT_REFRESH_US
+    dropped = sum(max(0, round(interval / refresh_us) - 1) for interval in intervals)
+    ordered = sorted(intervals)
+    return FrameStats(len(ordered), dropped, ordered[len(ordered) // 2] / 1000,
+                      ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)] / 1000, ordered[-1] / 1000)
+
+
+def dropped_ratio(stats):
+    expected = stats.frames + stats.dropped
+    return stats.dropped / expected if expected else 0.0
+
+
+def render_node_available(pattern="/dev/dri/renderD*"):
+    return bool(glob.glob(pattern))
+
+
+def software_rendering():
+    """True when compositing and GL fall back to the CPU"""
+    return os.environ.get("LIBGL_ALWAYS_SOFTWARE") == "1" or not render_node_available()
+
+
+class EffectsPolicy:
+    """Whether the welcome UI animates and draws translucent effects.
+
+    Starts from [Theme] EnableAnimations/EnableTransparency, turns both
+    off on machines without a GPU render node or with little RAM, and
+    turns both off later if page transitions keep dropping frames."""
+
+    def __init__(self, config=None):
+        config = config if config is not None else load_defaults()
+        self.animate = get_bool(config, "Theme", "EnableAnimations", default=True)
+        self.opaque = not get_bool(config, "Theme", "EnableTransparency", default=True)
+        self.reasons = []
+        if not self.animate:
+            self.reasons.append("animations disabled in settings")
+        if self.opaque:
+            self.reasons.append("transparency disabled in settings")
+
+        if software_rendering():
+            self.reduce("no GPU render node")
+        total, _ = read_meminfo()
+        if total and total < LOW_MEMORY:
+            self.reduce(f"{total / 1073741824:.1f} GiB RAM")
+        self.janky = 0
+
+    def reduce(self, reason):
+        self.animate = False
+        self.opaque = True
+        self.reasons.append(reason)
+
+    def record(self, stats):
+        """Account one transition; True when it switches the UI to reduced effects"""
+        if dropped_ratio(stats) <= DROP_RATIO:
+            return False
+        self.janky += 1
+        if self.janky >= DEGRADE_AFTER and self.animate:
+            self.reduce(f"{self.janky} transitions dropped frames")
+            return True
+        return False
@@ -0,0 +1,243 @@
+"""
+Ferret OS hardware probe
+Enumerates PCI/USB devices from sysfs and recommends drivers and firmware
+"""
+
+import fnmatch
+import os
+import re
+import time
+from collections import namedtuple
+
+from ferret.config import get_bool, load_defaults
+from ferret.updates import DPKG_STATUS, read_status
+
+SYSFS_BUS = "/sys/bus"
+
+Device = namedtuple("Device", "bus path vendor product device_class modalias driver")
+Recommendation = namedtuple("Recommendation", "category title packages installed devices")
+
+# [Hardware] key in ferret-defaults.conf controlling each category
+CATEGORY_KEYS = {
+    "vaapi": "EnableVaapi",
+    "vulkan": "EnableVulkan",
+    "opencl": "EnableOpenCL",
+    "microcode": "EnableMicrocode",
+    "firmware": "EnableFirmware",
+    "cuda": "EnableCUDA",
+}
+
+VENDOR_NAMES = {
+    "8086": "Intel",
+    "1002": "AMD",
+    "10de": "NVIDIA",
+    "1af4": "Virtio",
+    "15ad": "VMware",
+    "80ee": "VirtualBox",
+    "1234": "QEMU",
+}
+
+# (bus, vendor, class prefix, category, title, packages)
+# PCI classes are base+subclass hex ("0300" VGA, "0280" network other);
+# USB classes are the interface class+subclass+protocol ("e00101" Bluetooth)
+RECOMMENDATION_TABLE = [
+    ("pci", "8086", "03", "vaapi", "Intel video acceleration (VA-API)", ["intel-media-va-driver-non-free"]),
+    ("pci", "8086", "03", "vulkan", "Intel Vulkan driver", ["mesa-vulkan-drivers"]),
+    ("pci", "8086", "03", "opencl", "Intel OpenCL compute", ["intel-opencl-icd"]),
+    ("pci", "1002", "03", "firmware", "AMD graphics firmware", ["firmware-amd-graphics"]),
+    ("pci", "1002", "03", "vaapi", "AMD video acceleration (VA-API)", ["mesa-va-drivers"]),
+    ("pci", "1002", "03", "vulkan", "AMD Vulkan driver (RADV)", ["mesa-vulkan-drivers"]),
+    ("pci", "1002", "03", "opencl", "AMD OpenCL compute", ["mesa-opencl-icd"]),
+    ("pci", "10de", "03", "firmware", "NVIDIA open driver firmware", ["firmware-misc-nonfree"]),
+    ("pci", "10de", "03", "vaapi", "NVIDIA video acceleration (VA-API)", ["mesa-va-drivers"]),
+    ("pci", "10de", "03", "vulkan", "NVIDIA Vulkan driver", ["mesa-vulkan-drivers"]),
+    ("pci", "10de", "03", "cuda", "NVIDIA proprietary driver with CUDA", ["nvidia-driver", "nvidia-cuda-toolkit"]),
+    ("pci", "8086", "0280", "firmware", "Intel Wi-Fi firmware", ["firmware-iwlwifi"]),
+    ("pci", "10ec", "0280", "firmware", "Realtek Wi-Fi firmware", ["firmware-realtek"]),
+    ("pci", "10ec", "0200", "firmware", "Realtek Ethernet firmware", ["firmware-realtek"]),
+    ("pci", "14e4", "0280", "firmware", "Broadcom Wi-Fi firmware", ["firmware-brcm80211"]),
+    ("pci", "168c", "0280", "firmware", "Qualcomm Atheros Wi-Fi firmware", ["firmware-atheros"]),
+    ("pci", "17cb", "0280", "firmware", "Qualcomm Wi-Fi firmware", ["firmware-atheros"]),
+    ("usb", "8087", "e00101", "firmware", "Intel Bluetooth firmware", ["firmware-iwlwifi"]),
+    ("usb", "0bda", "e00101", "firmware", "Realtek Bluetooth firmware", ["firmware-realtek"]),
+    ("usb", "0cf3", "e00101", "firmware", "Qualcomm Bluetooth firmware", ["firmware-atheros"]),
+    ("cpu", "GenuineIntel", "", "microcode", "Intel CPU microcode updates", ["intel-microcode"]),
+    ("cpu", "AuthenticAMD", "", "microcode", "AMD CPU microcode updates", ["amd64-microcode"]),
+]
+
+
+def _compile_table(table):
+    """Index the recommendation table by (bus, vendor) for constant-time lookup"""
+    index = {}
+    for bus, vendor, class_prefix, category, title, packages in table:
+        index.setdefault((bus, vendor), []).append((class_prefix, category, title, tuple(packages)))
+    return index
+
+
+RECOMMENDATIONS = _compile_table(RECOMMENDATION_TABLE)
+
+PCI_MODALIAS = re.compile(r"pci:v0000([0-9A-F]{4})d0000([0-9A-F]{4}).*bc([0-9A-F]{2})sc([0-9A-F]{2})")
+USB_MODALIAS = re.compile(r"usb:v([0-9A-F]{4})p([0-9A-F]{4}).*ic([0-9A-F]{2})isc([0-9A-F]{2})ip([0-9A-F]{2})")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _driver(device_path):
+    try:
+        return os.path.basename(os.readlink(os.path.join(device_path, "driver")))
+    except OSError:
+        return ""
+
+
+def enumerate_devices(sysfs_bus=SYSFS_BUS):
+    """List PCI devices and USB interfaces from their modalias files"""
+    devices = []
+    for bus, pattern in (("pci", PCI_MODALIAS), ("usb", USB_MODALIAS)):
+        bus_dir = os.path.join(sysfs_bus, bus, "devices")
+        try:
+            entries = os.listdir(bus_dir)
+        except OSError:
+            continue
+        for name in entries:
+            path = os.path.join(bus_dir, name)
+            modalias = _read(os.path.join(path, "modalias"))
+            match = pattern.match(modalias)
+            if not match:
+                # USB devices without interfaces and hubs' root entries
+                continue
+            fields = match.groups()
+            devices.append(Device(
+                bus=bus,
+                path=path,
+                vendor=fields[0].lower(),
+                product=fields[1].lower(),
+                device_class="".join(fields[2:]).lower(),
+                modalias=modalias,
+                driver=_driver(path),
+            ))
+    return devices
+
+
+def cpu_vendor():
+    """Read vendor_id from the first processor entry only"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("vendor_id"):
+                    return line.split(":", 1)[1].strip()
+                if not line.strip():
+                    break
+    except OSError:
+        pass
+    return ""
+
+
+def installed_packages(status_path=DPKG_STATUS):
+    """Names of installed packages; removed-but-not-purged ones do not count"""
+    return {name for name, _ in read_status(status_path)}
+
+
+class ModaliasDatabase:
+    """Kernel module alias patterns bucketed by vendor, loaded on first use"""
+
+    def __init__(self, release=None):
+        self.path = f"/lib/modules/{release or os.uname().release}/modules.alias"
+        self.buckets = None
+
+    def load(self):
+        self.buckets = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if not (line.startswith("alias pci:") or line.startswith("alias usb:")):
+                        continue
+                    _, pattern, module = line.split()
+                    # "pci:v00008086d..." / "usb:v8087p..." -> literal vendor or "*"
+                    bus = pattern[:3]
+                    field = pattern[5:13] if bus == "pci" else pattern[5:9]
+                    vendor = field[-4:].lower() if "*" not in field and "?" not in field else "*"
+                    self.buckets.setdefault((bus, vendor), []).append((pattern, module))
+        except OSError:
+            pass
+
+    def lookup(self, device):
+        """Kernel modules able to drive a device that has no driver bound"""
+        if self.buckets is None:
+            self.load()
+        modules = []
+        for key in ((device.bus, device.vendor), (device.bus, "*")):
+            for pattern, module in self.buckets.get(key, ()):
+                if module not in modules and fnmatch.fnmatchcase(device.modalias, pattern):
+                    modules.append(module)
+        return modules
+
+
+class HardwareProbe:
+    """Match detected hardware against the driver recommendation table"""
+
+    def __init__(self, config=None, sysfs_bus=SYSFS_BUS):
+        self.config = config if config is not None else load_defaults()
+        self.sysfs_bus = sysfs_bus
+        self.modaliases = ModaliasDatabase()
+        self.devices = []
+        self.elapsed_ms = 0.0
+
+    def category_enabled(self, category):
+        key = CATEGORY_KEYS[category]
+        return get_bool(self.config, "Hardware", key, default=category != "cuda")
+
+    def probe(self):
+        """Enumerate hardware and return the list of Recommendations"""
+        start = time.perf_counter()
+        self.devices = enumerate_devices(self.sysfs_bus)
+        installed = installed_packages()
+
+        found = {}
+        candidates = [(device.bus, device.vendor, device.device_class, device) for device in self.devices]
+        vendor = cpu_vendor()
+        if vendor:
+            candidates.append(("cpu", vendor, "", None))
+
+        for bus, vendor, device_class, device in candidates:
+            for class_prefix, category, title, packages in RECOMMENDATIONS.get((bus, vendor), ()):
+                if not device_class.startswith(class_prefix) or not self.category_enabled(category):
+                    continue
+                entry = found.setdefault(title, (category, packages, []))
+                if device is not None:
+                    entry[2].append(device)
+
+        recommendations = [
+            Recommendation(category, title, list(packages),
+                           all(package in installed for package in packages), devices)
+            for title, (category, packages, devices) in found.items()
+        ]
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+        return recommendations
+
+    def unbound_devices(self):
+        """Devices without a bound driver, with the modules that could drive them"""
+        return [(device, self.modaliases.lookup(device)) for device in self.devices if not device.driver]
+
+    def graphics_summary(self):
+        '''Short description of display controllers, e.g. "Intel (i915)"'''
+        adapters = []
+        for device in self.devices:
+            if device.bus == "pci" and device.device_class.startswith("03"):
+                name = VENDOR_NAMES.get(device.vendor, f"PCI {device.vendor}:{device.product}")
+                adapters.append(f"{name} ({device.driver})" if device.driver else name)
+        return ", ".join(adapters)
+
+
+if __name__ == "__main__":
+    probe = HardwareProbe()
+    for recommendation in probe.probe():
+        state = "installed" if recommendation.installed else "recommended"
+        print(f"[{state}] {recommendation.title}: {' '.join(recommendation.packages)}")
+    print(f"Graphics: {probe.graphics_summary() or 'unknown'}")
+    print(f"Probe time: {probe.elapsed_ms:.1f} ms")
@@ -0,0 +1,216 @@
+"""
+Ferret OS live initramfs builder
+Builds a live-boot initramfs from the module closure actually needed to find and mount the medium
+"""
+
+import argparse
+import fnmatch
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+# Needed on every live boot regardless of hardware
+LIVE_MODULES = [
+    "squashfs", "overlay", "loop", "isofs", "cdrom", "sr_mod", "sd_mod",
+    "vfat", "nls_cp437", "nls_ascii", "nls_utf8", "ext4",
+    "usb_storage", "uas", "usbhid", "hid_generic",
+    "xhci_pci", "ehci_pci", "ohci_pci", "uhci_hcd",
+    "ahci", "ata_piix", "ata_generic", "nvme", "mmc_block", "sdhci_pci",
+    "virtio_pci", "virtio_blk", "virtio_scsi", "hv_storvsc", "vmw_pvscsi",
+]
+
+# Loaded at every boot from /etc/initramfs-tools/modules; the rest of the
+# closure is only copied into the image and udev loads what the hardware matches
+FORCE_LOAD = ["squashfs", "overlay", "loop"]
+
+HOOK = """#!/bin/sh
+# Generated by ferret-initramfs: live-boot modules, loaded by udev on demand
+PREREQ=""
+prereqs() {{ echo "$PREREQ"; }}
+case "$1" in
+    prereqs) prereqs; exit 0 ;;
+esac
+. /usr/share/initramfs-tools/hook-functions
+manual_add_modules {modules}
+"""
+
+# Device aliases of storage and USB host controllers: PCI mass-storage and
+# USB controller classes, USB mass-storage interfaces, virtio block/SCSI
+CONTROLLER_ALIASES = ["pci:*bc01*", "pci:*bc0Csc03*", "usb:*ic08*", "virtio:d00000002v*", "virtio:d00000008v*"]
+
+COMPRESSORS = ("zstd", "lz4", "xz", "gzip")
+VARIANTS = ("minimal", "generic")
+
+
+def module_name(path):
+    """Kernel module name for a modules.dep path, e.g. kernel/fs/fat/vfat.ko.xz -> vfat"""
+    name = os.path.basename(path)
+    name = name[:name.index(".ko")] if ".ko" in name else name
+    return name.replace("-", "_")
+
+
+class ModuleTree:
+    """modules.dep, modules.softdep, modules.alias and modules.builtin of one kernel"""
+
+    def __init__(self, modules_dir):
+        self.modules_dir = modules_dir
+        self.paths = {}
+        self.depends = {}
+        self.softdeps = {}
+        self.aliases = []
+        self.builtin = set()
+        self.load()
+
+    def _lines(self, name):
+        try:
+            with open(os.path.join(self.modules_dir, name)) as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
+
+    def load(self):
+        for line in self._lines("modules.dep"):
+            path, _, deps = line.partition(":")
+            name = module_name(path)
+            self.paths[name] = path
+            self.depends[name] = [module_name(dep) for dep in deps.split()]
+
+        for line in self._lines("modules.softdep"):
+            fields = line.split()
+            if len(fields) < 3 or fields[0] != "softdep":
+                continue
+            # "softdep ext4 pre: crc32c post: ..." -> every listed module
+            self.softdeps[fields[1].replace("-", "_")] = [
+                field.replace("-", "_") for field in fields[2:] if not field.endswith(":")]
+
+        for line in self._lines("modules.alias"):
+            fields = line.split()
+            if len(fields) == 3 and fields[0] == "alias":
+                self.aliases.append((fields[1], fields[2].replace("-", "_")))
+
+        self.builtin = {module_name(line) for line in self._lines("modules.builtin") if line}
+
+    def matching(self, patterns):
+        """Modules with a device alias matched by any of the patterns"""
+        match = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns)).match
+        return {module for alias, module in self.aliases if match(alias)}
+
+    def closure(self, seeds):
+        """Seeds plus everything they depend on (hard and soft), minus built-ins"""
+        closure, missing = set(), []
+        stack = list(seeds)
+        while stack:
+            name = stack.pop().replace("-", "_")
+            if name in closure:
+                continue
+            if name not in self.paths:
+                if name not in self.builtin:
+                    missing.append(name)
+                continue
+            closure.add(name)
+            stack.extend(self.depends.get(name, ()))
+            stack.extend(self.softdeps.get(name, ()))
+        return closure, missing
+
+    def size(self, modules):
+        total = 0
+        for name in modules:
+            try:
+                total += os.path.getsize(os.path.join(self.modules_dir, self.paths[name]))
+            except OSError:
+                pass
+        return total
+
+
+def kernel_version(root):
+    versions = sorted(os.listdir(os.path.join(root, "lib/modules")))
+    if not versions:
+        raise SystemExit("ferret-initramfs: no kernel modules found in the root")
+    return versions[-1]
+
+
+def live_modules(tree):
+    """Module closure for the minimal live image"""
+    return tree.closure(set(LIVE_MODULES) | tree.matching(CONTROLLER_ALIASES))
+
+
+def write_config(root, confdir, variant, compress, modules):
+    """Copy the root's initramfs-tools config, overriding MODULES and COMPRESS.
+
+    Only FORCE_LOAD goes into the modules file; the rest of the closure is
+    added by a generated hook so the image carries it without loading it."""
+    target = os.path.join(root, confdir.lstrip("/"))
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(os.path.join(root, "etc/initramfs-tools"), target, symlinks=True)
+
+    conf = os.path.join(target, "initramfs.conf")
+    with open(conf) as f:
+        lines = [line for line in f if not line.startswith(("MODULES=", "COMPRESS="))]
+    lines.append(f"MODULES={'list' if variant == 'minimal' else 'most'}\n")
+    lines.append(f"COMPRESS={compress}\n")
+    with open(conf, "w") as f:
+        f.writelines(lines)
+
+    with open(os.path.join(target, "modules"), "w") as f:
+        f.write("# Generated by ferret-initramfs\n")
+        f.writelines(f"{name}\n" for name in FORCE_LOAD)
+
+    if modules:
+        hook = os.path.join(target, "hooks", "ferret-live-modules")
+        os.makedirs(os.path.dirname(hook), exist_ok=True)
+        with open(hook, "w") as f:
+            f.write(HOOK.format(modules=" ".join(sorted(modules))))
+        os.chmod(hook, 0o755)
+
+
+def build(root, output, variant="minimal", compress="zstd", version=None):
+    """Run mkinitramfs inside the root with a generated config directory"""
+    version = version or kernel_version(root)
+    tree = ModuleTree(os.path.join(root, "lib/modules", version))
+    modules, missing = live_modules(tree) if variant == "minimal" else (set(), [])
+
+    confdir = f"/tmp/ferret-initramfs-{variant}"
+    image = f"/tmp/ferret-initrd-{variant}.img"
+    write_config(root, confdir, variant, compress, modules)
+    subprocess.run(["chroot", root, "mkinitramfs", "-d", confdir, "-o", image, version], check=True)
+    shutil.move(os.path.join(root, image.lstrip("/")), output)
+    shutil.rmtree(os.path.join(root, confdir.lstrip("/")), ignore_errors=True)
+    return modules, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-initramfs", description="Build the Ferret OS live initramfs")
+    parser.add_argument("--root", required=True, help="target root filesystem (chroot)")
+    parser.add_argument("--kernel", help="kernel version (default: newest in the root)")
+    parser.add_argument("--variant", choices=VARIANTS, default="minimal",
+                        help="minimal: live-boot module closure; generic: MODULES=most fallback")
+    parser.add_argument("--compress", choices=COMPRESSORS, default="zstd")
+    parser.add_argument("-o", "--output", help="image to write")
+    parser.add_argument("--list", action="store_true", help="print the module closure and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        tree = ModuleTree(os.path.join(args.root, "lib/modules", args.kernel or kernel_version(args.root)))
+        modules, missing = live_modules(tree)
+        for name in sorted(modules):
+            print(name)
+        print(f"{len(modules)} modules, {tree.size(modules) / 1048576:.1f} MiB uncompressed", file=sys.stderr)
+        if missing:
+            print(f"not available: {' '.join(sorted(missing))}", file=sys.stderr)
+        return 0
+
+    if not args.output:
+        parser.error("--output is required unless --list is given")
+    modules, missing = build(args.root, args.output, args.variant, args.compress, args.kernel)
+    if missing:
+        print(f"ferret-initramfs: not available in this kernel: {' '.join(sorted(missing))}", file=sys.stderr)
+    size = os.path.getsize(args.output)
+    detail = f"{len(modules)} modules, " if args.variant == "minimal" else ""
+    print(f"{args.output}: {args.variant}, {detail}{args.compress}, {size / 1048576:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
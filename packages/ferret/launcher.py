@@ -0,0 +1,183 @@
+"""
+Ferret OS action launcher
+Resolves welcome-app actions once per session and supervises the processes they start
+"""
+
+import os
+import threading
+import time
+
+# Candidate commands per action, in order of preference
+ACTIONS = {
+    "network": [["nm-connection-editor"], ["xfce4-settings-manager"]],
+    "updates": [["gnome-software", "--mode=updates"],
+                ["xfce4-terminal", "-e", "sudo apt update && sudo apt upgrade"]],
+    "app-store": [["gnome-software"], ["synaptic"]],
+    "settings": [["xfce4-settings-manager"]],
+    "file-manager": [["thunar"]],
+    "terminal": [["xfce4-terminal"]],
+    "manual": [["xfce4-terminal", "-e", "man intro"]],
+    "help": [["yelp"]],
+    "installer": [["pkexec", "calamares"], ["calamares"]],
+}
+
+# Commands that run another program given as their first argument
+WRAPPERS = {"pkexec"}
+
+
+def build_path_index(path=None):
+    """Map command names to executables, scanning each PATH directory once"""
+    index = {}
+    for directory in (path if path is not None else os.environ.get("PATH", os.defpath)).split(os.pathsep):
+        try:
+            entries = os.scandir(directory or ".")
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name in index:
+                    continue
+                try:
+                    if entry.is_file() and os.access(entry.path, os.X_OK):
+                        index[entry.name] = entry.path
+                except OSError:
+                    pass
+    return index
+
+
+class LaunchStats:
+    """Spawn latency for one action, in milliseconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.deduplicated = 0
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class ActionLauncher:
+    """Start actions without blocking the UI and reap every child.
+
+    With glib=True children are spawned with GLib.spawn_async and reaped by
+    a child watch on the GTK main loop; otherwise os.posix_spawn is used
+    and a small waiter thread reaps each child (for the Tk app)."""
+
+    def __init__(self, actions=None, glib=False, path=None):
+        self.actions = actions if actions is not None else ACTIONS
+        self.glib = glib
+        self.path = path
+        self.resolved = None
+        self.running = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def resolve_all(self):
+        """Pick the first available candidate for every action"""
+        index = build_path_index(self.path)
+        resolved = {}
+        for action, candidates in self.actions.items():
+            for argv in candidates:
+                needed = argv[:2] if argv[0] in WRAPPERS else argv[:1]
+                if all(name in index for name in needed):
+                    resolved[action] = [index[argv[0]]] + list(argv[1:])
+                    break
+        self.resolved = resolved
+        return resolved
+
+    def command(self, action):
+        """Resolved argv for an action, or None if nothing is installed"""
+        if self.resolved is None:
+            self.resolve_all()
+        return self.resolved.get(action)
+
+    def is_running(self, action):
+        with self.lock:
+            return action in self.running
+
+    def launch(self, action, on_exit=None):
+        """Start an action unless it is already running.
+
+        Returns the child pid (the existing one for a duplicate launch), or
+        None when no candidate command is installed or spawning failed."""
+        stats = self.stats.setdefault(action, LaunchStats())
+        with self.lock:
+            if action in self.running:
+                stats.deduplicated += 1
+                return self.running[action]
+
+        argv = self.command(action)
+        if argv is None:
+            return None
+        start = time.perf_counter()
+        try:
+            pid = self._spawn_glib(action, argv, on_exit) if self.glib else self._spawn_posix(action, argv, on_exit)
+        except (OSError, RuntimeError):
+            # GLib.Error is a RuntimeError subclass
+            self.resolved = None
+            return None
+
+        stats.add((time.perf_counter() - start) * 1000)
+        return pid
+
+    def _exited(self, action, status, on_exit):
+        with self.lock:
+            self.running.pop(action, None)
+        if on_exit:
+            on_exit(action, status)
+
+    def _spawn_glib(self, action, argv, on_exit):
+        from gi.repository import GLib
+
+        pid, _, _, _ = GLib.spawn_async(argv, flags=GLib.SpawnFlags.DO_NOT_REAP_CHILD)
+
+        def child_exited(child, status):
+            GLib.spawn_close_pid(child)
+            self._exited(action, status, on_exit)
+
+        with self.lock:
+            self.running[action] = int(pid)
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, pid, child_exited)
+        return int(pid)
+
+    def _spawn_posix(self, action, argv, on_exit):
+        pid = os.posix_spawn(argv[0], argv, os.environ)
+        with self.lock:
+            self.running[action] = pid
+
+        def wait():
+            _, status = os.waitpid(pid, 0)
+            self._exited(action, status, on_exit)
+
+        threading.Thread(target=wait, daemon=True).start()
+        return pid
+
+    def summary(self):
+        """Per-action launch counts and latency, for diagnostics"""
+        return {
+            action: {
+                "launches": stats.count,
+                "deduplicated": stats.deduplicated,
+                "mean_ms": round(stats.mean_ms, 2),
+                "max_ms": round(stats.max_ms, 2),
+            }
+            for action, stats in self.stats.items()
+        }
+
+
+if __name__ == "__main__":
+    launcher = ActionLauncher()
+    start = time.perf_counter()
+    resolved = launcher.resolve_all()
+    elapsed = (time.perf_counter() - start) * 1000
+    for action in ACTIONS:
+        print(f"{action:14} {' '.join(resolved[action]) if action in resolved else '(not installed)'}")
+    print(f"Resolved in {elapsed:.1f} ms")
@@ -0,0 +1,330 @@
+"""
+Ferret OS media check
+Parallel, resumable verification of live media against a chunked Merkle manifest
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MANIFEST_VERSION = 1
+# O_DIRECT needs buffers, offsets and lengths aligned to the logical block size
+ALIGNMENT = 4096
+
+
+def merkle_root(chunks):
+    """Root of a binary hash tree over chunk digests (odd nodes carry up)"""
+    level = [bytes.fromhex(chunk) for chunk in chunks] or [hashlib.sha256(b"").digest()]
+    while len(level) > 1:
+        paired = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+class ChunkReader:
+    """Positional chunk reads into a per-thread aligned buffer.
+
+    O_DIRECT keeps throughput stable and avoids filling the page cache
+    with the whole image; filesystems that refuse it (iso9660, tmpfs)
+    fall back to buffered reads with readahead hints, dropping each chunk
+    from the cache once it has been hashed."""
+
+    def __init__(self, path, chunk_size, direct=True):
+        self.chunk_size = chunk_size
+        self.direct = False
+        self.fd = None
+        if direct and hasattr(os, "O_DIRECT") and chunk_size % ALIGNMENT == 0:
+            try:
+                self.fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+                self.direct = True
+            except OSError:
+                self.fd = None
+        if self.fd is None:
+            self.fd = os.open(path, os.O_RDONLY)
+            self._advise(0, 0, "POSIX_FADV_SEQUENTIAL")
+        self.local = threading.local()
+
+    def _advise(self, offset, length, advice):
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(self.fd, offset, length, getattr(os, advice))
+            except OSError:
+                pass
+
+    def _buffer(self):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            # Anonymous mappings are page aligned, as O_DIRECT requires
+            buffer = self.local.buffer = mmap.mmap(-1, self.chunk_size)
+        return buffer
+
+    def digest(self, index, size):
+        """sha256 of one chunk; hashlib and preadv release the GIL"""
+        offset = index * self.chunk_size
+        length = min(self.chunk_size, size - offset)
+        buffer = self._buffer()
+        if not self.direct:
+            self._advise(offset + self.chunk_size, self.chunk_size, "POSIX_FADV_WILLNEED")
+
+        view = memoryview(buffer)
+        done = 0
+        while done < length:
+            # Direct reads must request whole aligned blocks, even at the end of the file
+            request = self.chunk_size - done if self.direct else length - done
+            count = os.preadv(self.fd, [view[done:done + request]], offset + done)
+            if count <= 0:
+                break
+            done += count
+        digest = hashlib.sha256(view[:min(done, length)]).hexdigest()
+        view.release()
+
+        if not self.direct:
+            self._advise(offset, length, "POSIX_FADV_DONTNEED")
+        return digest if done >= length else None
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _chunk_count(size, chunk_size):
+    return max(1, (size + chunk_size - 1) // chunk_size)
+
+
+def _expand(root, paths):
+    """Files under root for each given file or directory, relative to root"""
+    found = []
+    for path in paths:
+        full = os.path.join(root, path)
+        if os.path.isdir(full):
+            for directory, _, names in sorted(os.walk(full)):
+                for name in sorted(names):
+                    found.append(os.path.relpath(os.path.join(directory, name), root))
+        else:
+            found.append(os.path.relpath(full, root))
+    return found
+
+
+def generate(root, paths, chunk_size=CHUNK_SIZE, jobs=None, direct=True):
+    """Hash every chunk of the given files and build a manifest"""
+    files = []
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        for path in _expand(root, paths):
+            full = os.path.join(root, path)
+            size = os.path.getsize(full)
+            reader = ChunkReader(full, chunk_size, direct)
+            try:
+                chunks = list(pool.map(lambda index: reader.digest(index, size),
+                                       range(_chunk_count(size, chunk_size))))
+            finally:
+                reader.close()
+            files.append({"path": path, "size": size, "root": merkle_root(chunks), "chunks": chunks})
+    return {
+        "version": MANIFEST_VERSION,
+        "algorithm": "sha256",
+        "chunk_size": chunk_size,
+        "root": merkle_root([entry["root"] for entry in files]),
+        "files": files,
+    }
+
+
+class ResumeState:
+    """Chunks already verified, saved periodically so an interrupted check can continue"""
+
+    def __init__(self, path, manifest_root):
+        self.path = path
+        self.manifest_root = manifest_root
+        self.done = {}
+        self.bad = {}
+        self.saved = time.monotonic()
+        if path:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("root") == manifest_root:
+                    self.done = {name: set(chunks) for name, chunks in data["done"].items()}
+                    self.bad = {name: set(chunks) for name, chunks in data["bad"].items()}
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def record(self, name, index, ok):
+        (self.done if ok else self.bad).setdefault(name, set()).add(index)
+        if ok:
+            # A chunk that failed last time may have been repaired since
+            self.bad.get(name, set()).discard(index)
+        if self.path and time.monotonic() - self.saved > 2:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        self.saved = time.monotonic()
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"root": self.manifest_root,
+                       "done": {name: sorted(chunks) for name, chunks in self.done.items()},
+                       "bad": {name: sorted(chunks) for name, chunks in self.bad.items()}}, f)
+        os.replace(temp, self.path)
+
+    def remove(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def _regions(indices, chunk_size, size, actual):
+    """Merge bad chunk indices and any size mismatch into (first byte, last byte) ranges"""
+    ranges = [(index * chunk_size, min(size, (index + 1) * chunk_size) - 1) for index in indices]
+    if actual != size:
+        ranges.append((min(actual, size), max(actual, size) - 1))
+    regions = []
+    for start, end in sorted(ranges):
+        if regions and regions[-1][1] + 1 >= start:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def verify(manifest, root, jobs=None, state_path=None, direct=True, progress=None):
+    """Check every chunk; returns {path: [(first byte, last byte), ...]} for corrupt files"""
+    chunk_size = manifest["chunk_size"]
+    state = ResumeState(state_path, manifest["root"])
+    total = sum(_chunk_count(entry["size"], chunk_size) for entry in manifest["files"])
+    checked = sum(len(chunks) for chunks in state.done.values())
+    corrupt = {}
+    lock = threading.Lock()
+
+    pool = ThreadPoolExecutor(max_workers=jobs or os.cpu_count())
+    try:
+        for entry in manifest["files"]:
+            name, size, chunks = entry["path"], entry["size"], entry["chunks"]
+            full = os.path.join(root, name)
+            try:
+                actual = os.path.getsize(full)
+            except OSError:
+                corrupt[name] = [(0, size - 1)]
+                continue
+            # Only verified chunks are skipped; bad ones are hashed again in case the file was replaced
+            skip = state.done.get(name, set())
+            pending = [index for index in range(len(chunks)) if index not in skip]
+            reader = ChunkReader(full, chunk_size, direct)
+
+            def check(index):
+                nonlocal checked
+                try:
+                    ok = index * chunk_size < actual and reader.digest(index, size) == chunks[index]
+                except OSError:
+                    # Unreadable sectors are corruption too
+                    ok = False
+                with lock:
+                    state.record(name, index, ok)
+                    checked += 1
+                    if progress:
+                        progress(checked, total)
+
+            try:
+                list(pool.map(check, pending))
+            finally:
+                reader.close()
+            bad = state.bad.get(name)
+            if bad or actual != size:
+                corrupt[name] = _regions(bad or (), chunk_size, size, actual)
+    except KeyboardInterrupt:
+        # Let in-flight chunks finish so the saved state is accurate
+        pool.shutdown(wait=True, cancel_futures=True)
+        state.save()
+        raise
+    pool.shutdown()
+
+    if corrupt:
+        state.save()
+    else:
+        state.remove()
+    return corrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-mediacheck", description="Verify Ferret OS live media")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_cmd = commands.add_parser("generate", help="write a manifest for files under --root")
+    generate_cmd.add_argument("paths", nargs="+", help="files or directories, relative to --root")
+    generate_cmd.add_argument("--root", default=".")
+    generate_cmd.add_argument("-o", "--output", required=True)
+    generate_cmd.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    verify_cmd = commands.add_parser("verify", help="check files under --root against a manifest")
+    verify_cmd.add_argument("manifest")
+    verify_cmd.add_argument("--root", help="directory the manifest paths are relative to "
+                                           "(default: the manifest's directory)")
+    verify_cmd.add_argument("--state", help="resume file; an interrupted check continues from it")
+
+    for command in (generate_cmd, verify_cmd):
+        command.add_argument("-j", "--jobs", type=int, default=None, help="parallel readers (default: CPUs)")
+        command.add_argument("--no-direct", action="store_true", help="use buffered reads instead of O_DIRECT")
+
+    args = parser.parse_args(argv)
+    start = time.monotonic()
+
+    if args.command == "generate":
+        manifest = generate(args.root, args.paths, args.chunk_size, args.jobs, not args.no_direct)
+        with open(args.output, "w") as f:
+            json.dump(manifest, f, indent=1)
+        size = sum(entry["size"] for entry in manifest["files"])
+        elapsed = time.monotonic() - start
+        print(f"{len(manifest['files'])} files, {size / 1048576:.0f} MiB hashed in {elapsed:.1f} s "
+              f"({size / 1048576 / max(elapsed, 0.001):.0f} MiB/s), root {manifest['root']}")
+        return 0
+
+    try:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ferret-mediacheck: cannot read manifest: {e}", file=sys.stderr)
+        return 2
+    if manifest.get("version") != MANIFEST_VERSION:
+        print("ferret-mediacheck: unsupported manifest version", file=sys.stderr)
+        return 2
+
+    shown = [0]
+
+    def progress(checked, total):
+        percent = checked * 100 // total
+        if percent != shown[0]:
+            shown[0] = percent
+            print(f"\rChecking media... {percent}%", end="", file=sys.stderr, flush=True)
+
+    root = args.root or os.path.dirname(os.path.abspath(args.manifest))
+    try:
+        corrupt = verify(manifest, root, args.jobs, args.state, not args.no_direct,
+                         progress if sys.stderr.isatty() else None)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run again with the same --state to resume", file=sys.stderr)
+        return 130
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+
+    size = sum(entry["size"] for entry in manifest["files"])
+    elapsed = time.monotonic() - start
+    if not corrupt:
+        print(f"Media OK: {size / 1048576:.0f} MiB verified in {elapsed:.1f} s, root {manifest['root']}")
+        return 0
+    for name, regions in corrupt.items():
+        for first, last in regions:
+            print(f"CORRUPT {name}: bytes {first}-{last} ({(last - first + 1) / 1048576:.1f} MiB)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Ferret OS application metrics
+Per-thread counters and latency histograms exported as JSON over a Unix socket
+"""
+
+import atexit
+import errno
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in microseconds; the last bucket is unbounded
+BUCKETS_US = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000,
+              100000, 250000, 500000, 1000000, 2500000, 5000000)
+
+
+def socket_path(app="ferret-welcome"):
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    return os.path.join(runtime_dir, app, "metrics.sock")
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.count = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def add(self, micros):
+        self.counts[bisect_left(BUCKETS_US, micros)] += 1
+        self.count += 1
+        self.sum_us += micros
+        if micros > self.max_us:
+            self.max_us = micros
+
+
+class Shard:
+    """Metrics written by one thread only, so updates need no lock"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class Metrics:
+    """Counters and histograms, sharded per thread and merged when scraped"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.local = threading.local()
+        self.shards = []
+        self.sources = {}
+
+    def _shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = Shard()
+            # list.append is atomic; the scraper only ever reads this list
+            self.shards.append(shard)
+            return shard
+
+    def count(self, name, value=1):
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        histograms = self._shard().histograms
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.add(int(seconds * 1000000))
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def add_source(self, name, callback):
+        """Include callback() in every snapshot, e.g. a component's own stats"""
+        self.sources[name] = callback
+
+    def snapshot(self):
+        """Merged view of all shards, safe to call from any thread"""
+        counters, histograms = {}, {}
+        for shard in list(self.shards):
+            for name, value in list(shard.counters.items()):
+                counters[name] = counters.get(name, 0) + value
+            for name, histogram in list(shard.histograms.items()):
+                merged = histograms.setdefault(name, {"count": 0, "sum_us": 0, "max_us": 0,
+                                                      "buckets": [0] * (len(BUCKETS_US) + 1)})
+                merged["count"] += histogram.count
+                merged["sum_us"] += histogram.sum_us
+                merged["max_us"] = max(merged["max_us"], histogram.max_us)
+                for i, value in enumerate(histogram.counts):
+                    merged["buckets"][i] += value
+
+        for merged in histograms.values():
+            bounds = [str(bound) for bound in BUCKETS_US] + ["inf"]
+            merged["buckets"] = dict(zip(bounds, merged["buckets"]))
+
+        snapshot = {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+        for name, callback in list(self.sources.items()):
+            try:
+                snapshot[name] = callback()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+
+class StallMonitor:
+    """Detect main-loop stalls from a heartbeat the loop itself schedules.
+
+    beat() is meant to run every `interval` seconds from the UI main loop
+    (GLib.timeout_add or Tk's after); a beat that arrives more than
+    `threshold` seconds late means the loop was blocked that long."""
+
+    def __init__(self, metrics, interval=0.1, threshold=0.05):
+        self.metrics = metrics
+        self.interval = interval
+        self.threshold = threshold
+        self.last = time.monotonic()
+
+    def beat(self):
+        now = time.monotonic()
+        late = now - self.last - self.interval
+        self.last = now
+        if late > self.threshold:
+            self.metrics.count("mainloop.stalls")
+            self.metrics.observe("mainloop.stall", late)
+        return True
+
+
+class MetricsServer:
+    """Answer each connection on a 0600 Unix socket with one JSON snapshot"""
+
+    def __init__(self, metrics, path=None):
+        self.metrics = metrics
+        self.path = path or socket_path()
+        self.sock = None
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Only remove a stale socket; a running instance keeps its endpoint
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.path)
+            except FileNotFoundError:
+                pass
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+            else:
+                raise OSError(errno.EADDRINUSE, "metrics endpoint already in use", self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.path)
+            # The umask is process-wide and other threads create files, so chmod
+            # after bind instead; the 0700 directory covers the moment in between
+            os.chmod(self.path, 0o600)
+        except OSError:
+            sock.close()
+            raise
+        sock.listen(4)
+        self.sock = sock
+        atexit.register(self.stop)
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self
+
+    def serve(self):
+        while self.sock is not None:
+            try:
+                connection, _ = self.sock.accept()
+            except OSError:
+                break
+            with connection:
+                try:
+                    connection.sendall(json.dumps(self.metrics.snapshot()).encode() + b"\n")
+                except OSError:
+                    pass
+
+    def stop(self):
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def start_server(metrics):
+    """Start the endpoint if the runtime directory allows it; the UI runs either way"""
+    try:
+        return MetricsServer(metrics).start()
+    except OSError:
+        return None
+
+
+def scrape(path=None):
+    """Read one snapshot from a running application"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path or socket_path())
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+if __name__ == "__main__":
+    try:
+        print(json.dumps(scrape(sys.argv[1] if len(sys.argv) > 1 else None), indent=2))
+    except OSError as e:
+        print(f"Could not reach ferret-welcome metrics: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,301 @@
+"""
+Ferret OS adaptive preloader
+Learns which applications users launch in sequence and prefetches the next one's files
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from ferret.config import get_bool, load_defaults
+from ferret.sysinfo import read_meminfo
+
+STATE_DIR = "/var/lib/ferret-preload"
+MODEL_VERSION = 1
+# Processes of system users (daemons started at boot) are not "launches"
+MIN_UID = 1000
+# Mapped files kept per application and transitions kept per application
+MAX_FILES = 512
+MAX_WEIGHT = 50.0
+# Only prefetch predictions at least this likely, at most this many at a time
+MIN_PROBABILITY = 0.2
+MAX_PREDICTIONS = 3
+# Leave this share of RAM free and stay idle while reclaim is stalling tasks
+MEMORY_RESERVE = 0.2
+PSI_LIMIT = 1.0
+# A prefetched file stays warm for a while; do not re-read it sooner
+PREFETCH_TTL = 600
+SKIPPED_MAPPINGS = ("/dev/", "/proc/", "/sys/", "/memfd:", "/SYSV", "/tmp/", "/run/")
+
+
+def memory_pressure(path="/proc/pressure/memory"):
+    """PSI "some" avg10 percentage, or 0.0 on kernels without PSI"""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith("some "):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition("=")
+                        if key == "avg10":
+                            return float(value)
+    except (OSError, ValueError):
+        pass
+    return 0.0
+
+
+def prefetch_budget():
+    """Bytes that may be read into the page cache right now (0 under pressure)"""
+    if memory_pressure() >= PSI_LIMIT:
+        return 0
+    total, available = read_meminfo()
+    return max(0, available - int(total * MEMORY_RESERVE))
+
+
+def running_executables(min_uid=MIN_UID):
+    """{pid: executable} for processes owned by regular users"""
+    running = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            if os.stat(f"/proc/{name}").st_uid < min_uid:
+                continue
+            exe = os.readlink(f"/proc/{name}/exe")
+        except OSError:
+            # Kernel threads and processes that exited during the scan
+            continue
+        if not exe.endswith(" (deleted)"):
+            running[int(name)] = exe
+    return running
+
+
+def mapped_files(pid):
+    """Regular files mapped by a process: shared libraries, locale and icon caches"""
+    files = set()
+    try:
+        with open(f"/proc/{pid}/maps") as f:
+            for line in f:
+                fields = line.split(None, 5)
+                if len(fields) == 6:
+                    path = fields[5].strip()
+                    if path.startswith("/") and not path.endswith(" (deleted)") \
+                            and not path.startswith(SKIPPED_MAPPINGS):
+                        files.add(path)
+    except OSError:
+        pass
+    return files
+
+
+class Model:
+    """Launch counts, first-order launch transitions and each application's files"""
+
+    def __init__(self):
+        self.apps = {}
+        self.transitions = {}
+
+    @classmethod
+    def load(cls, path):
+        model = cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MODEL_VERSION:
+                model.apps = data["apps"]
+                model.transitions = data["transitions"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return model
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"version": MODEL_VERSION, "apps": self.apps, "transitions": self.transitions}, f)
+        os.replace(temp, path)
+
+    def _app(self, exe):
+        return self.apps.setdefault(exe, {"launches": 0, "files": {}})
+
+    def launched(self, exe, previous=None):
+        self._app(exe)["launches"] += 1
+        if previous and previous != exe:
+            row = self.transitions.setdefault(previous, {})
+            row[exe] = row.get(exe, 0) + 1
+            # Halve old counts so changed habits win within a few days
+            if sum(row.values()) > MAX_WEIGHT:
+                for key in list(row):
+                    row[key] /= 2
+                    if row[key] < 0.5:
+                        del row[key]
+
+    def add_files(self, exe, paths):
+        files = self._app(exe)["files"]
+        for path in paths:
+            if path in files or len(files) >= MAX_FILES:
+                continue
+            try:
+                files[path] = os.stat(path).st_size
+            except OSError:
+                pass
+
+    def predict(self, exe):
+        """[(probability, next executable)] most likely first"""
+        row = self.transitions.get(exe, {})
+        total = sum(row.values())
+        if not total:
+            return []
+        ranked = sorted(((count / total, name) for name, count in row.items()), reverse=True)
+        return [(p, name) for p, name in ranked if p >= MIN_PROBABILITY][:MAX_PREDICTIONS]
+
+    def files(self, exe):
+        """(path, size) pairs of an application, executable first"""
+        app = self.apps.get(exe)
+        if not app:
+            return []
+        return [(exe, app["files"].get(exe, 0))] + [item for item in app["files"].items() if item[0] != exe]
+
+
+class Preloader:
+    """/proc sampling loop that records launches and prefetches predicted applications"""
+
+    def __init__(self, state_dir=STATE_DIR, interval=2.0):
+        self.model_path = os.path.join(state_dir, "model.json")
+        self.model = Model.load(self.model_path)
+        self.interval = interval
+        self.running = {}
+        self.mapped = set()
+        self.previous = None
+        self.warm = {}
+        self.stats = {"launches": 0, "prefetched_files": 0, "prefetched_bytes": 0, "skipped_pressure": 0}
+        self.stop_event = threading.Event()
+
+    def prefetch(self, exe):
+        """Ask the kernel to read an application's files in the background"""
+        budget = prefetch_budget()
+        if not budget:
+            self.stats["skipped_pressure"] += 1
+            return 0
+        now = time.monotonic()
+        started = 0
+        for path, size in self.model.files(exe):
+            if now - self.warm.get(path, -PREFETCH_TTL) < PREFETCH_TTL:
+                continue
+            if size > budget:
+                break
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                self.model.apps[exe]["files"].pop(path, None)
+                continue
+            try:
+                # Readahead is queued and this returns without waiting for the I/O
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+            self.warm[path] = now
+            budget -= size
+            started += size
+            self.stats["prefetched_files"] += 1
+        self.stats["prefetched_bytes"] += started
+        return started
+
+    def scan(self):
+        """One sample: record new launches, learn mapped files, prefetch predictions"""
+        current = running_executables()
+        before = set(self.running.values())
+        launched = []
+        for pid, exe in current.items():
+            if pid not in self.running and exe not in before and exe not in launched:
+                launched.append(exe)
+
+        for exe in launched:
+            self.model.launched(exe, self.previous)
+            self.previous = exe
+            self.stats["launches"] += 1
+
+        # Libraries are still being loaded right after exec, so read maps one sample later
+        for pid, exe in self.running.items():
+            if current.get(pid) == exe and pid not in self.mapped:
+                self.mapped.add(pid)
+                self.model.add_files(exe, mapped_files(pid))
+        self.mapped &= set(current)
+        self.running = current
+
+        if launched:
+            active = set(current.values())
+            for _, name in self.model.predict(launched[-1]):
+                if name not in active:
+                    self.prefetch(name)
+
+    def run(self):
+        # Whatever is already running was not launched while we watched
+        self.running = running_executables()
+        last_save = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            self.scan()
+            if time.monotonic() - last_save > 300:
+                self.model.save(self.model_path)
+                last_save = time.monotonic()
+        self.model.save(self.model_path)
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-preload", description="Ferret OS adaptive application preloader")
+    parser.add_argument("--state-dir", default=STATE_DIR, help="where the launch model is kept")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="sample launches and prefetch predicted applications")
+    run_cmd.add_argument("--interval", type=float, default=2.0, help="seconds between /proc samples")
+    run_cmd.add_argument("--force", action="store_true", help="run even if [Performance] EnablePreload is false")
+
+    commands.add_parser("stats", help="show the learned launch model")
+
+    prefetch_cmd = commands.add_parser("prefetch", help="prefetch the learned files of applications now")
+    prefetch_cmd.add_argument("executables", nargs="+")
+
+    args = parser.parse_args(argv)
+    preloader = Preloader(args.state_dir, getattr(args, "interval", 2.0))
+    model = preloader.model
+
+    if args.command == "stats":
+        if not model.apps:
+            print("No launches recorded yet")
+            return 0
+        for exe, app in sorted(model.apps.items(), key=lambda item: -item[1]["launches"]):
+            size = sum(app["files"].values())
+            predictions = ", ".join(f"{os.path.basename(name)} {p:.0%}" for p, name in model.predict(exe))
+            print(f"{app['launches']:5} {exe} ({len(app['files'])} files, {size / 1048576:.1f} MiB)"
+                  + (f" -> {predictions}" if predictions else ""))
+        return 0
+
+    if args.command == "prefetch":
+        for exe in args.executables:
+            started = preloader.prefetch(exe)
+            print(f"{exe}: {started / 1048576:.1f} MiB queued" if started
+                  else f"{exe}: nothing to prefetch (unknown, already warm or memory pressure)")
+        return 0
+
+    if not args.force and not get_bool(load_defaults(), "Performance", "EnablePreload", default=False):
+        print("ferret-preload: disabled by [Performance] EnablePreload in ferret-defaults.conf")
+        return 0
+
+    signal.signal(signal.SIGTERM, preloader.stop)
+    signal.signal(signal.SIGINT, preloader.stop)
+    preloader.run()
+    print(f"ferret-preload: {preloader.stats['launches']} launches, "
+          f"{preloader.stats['prefetched_bytes'] / 1048576:.1f} MiB prefetched, "
+          f"{preloader.stats['skipped_pressure']} prefetches skipped under memory pressure")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
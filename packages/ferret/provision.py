@@ -0,0 +1,270 @@
+"""
+Ferret OS provisioning
+Applies a declarative manifest (apps, autostart, theme) with the fewest actions needed
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from ferret.updates import read_status
+
+FLATPAK_DIRS = ("/var/lib/flatpak/app", os.path.expanduser("~/.local/share/flatpak/app"))
+AUTOSTART_FILE = os.path.expanduser("~/.config/autostart/ferret-welcome.desktop")
+SYSTEM_AUTOSTART_FILE = "/etc/xdg/autostart/ferret-welcome.desktop"
+XSETTINGS_FILE = os.path.expanduser("~/.config/xfce4/xfconf/xfce-perchannel-xml/xsettings.xml")
+
+AUTOSTART_ENTRY = """[Desktop Entry]
+Type=Application
+Name=Ferret Welcome
+Exec=ferret-welcome --autostart
+Hidden={hidden}
+NoDisplay=false
+X-GNOME-Autostart-enabled={enabled}
+"""
+
+App = namedtuple("App", "id backend")
+Action = namedtuple("Action", "backend description items")
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load_manifest(path):
+    """Read and validate a provisioning manifest.
+
+    {
+      "apps": ["org.mozilla.firefox", {"id": "git", "backend": "apt"}],
+      "autostart": false,
+      "theme": {"/Net/ThemeName": "Arc-Dark", "/Gtk/FontName": "Inter 10"}
+    }
+
+    Bare app ids with two or more dots are Flatpak ids, anything else is
+    an apt package name."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"cannot read {path}: {e}")
+    if not isinstance(data, dict):
+        raise ManifestError("manifest must be a JSON object")
+
+    apps = []
+    for item in data.get("apps", []):
+        if isinstance(item, str):
+            apps.append(App(item, "flatpak" if item.count(".") >= 2 else "apt"))
+        elif isinstance(item, dict) and item.get("backend", "flatpak") in ("flatpak", "apt") and "id" in item:
+            apps.append(App(item["id"], item.get("backend", "flatpak")))
+        else:
+            raise ManifestError(f"invalid app entry: {item!r}")
+
+    autostart = data.get("autostart")
+    if autostart is not None and not isinstance(autostart, bool):
+        raise ManifestError("autostart must be true or false")
+
+    theme = data.get("theme", {})
+    if not isinstance(theme, dict):
+        raise ManifestError("theme must map xsettings properties to values")
+    theme = {("/" + key.lstrip("/")): value for key, value in theme.items()}
+
+    return {"apps": apps, "autostart": autostart, "theme": theme}
+
+
+def installed_flatpaks(dirs=FLATPAK_DIRS):
+    """Flatpak application ids deployed system-wide or for this user"""
+    installed = set()
+    for directory in dirs:
+        try:
+            for name in os.listdir(directory):
+                if os.path.exists(os.path.join(directory, name, "current")):
+                    installed.add(name)
+        except OSError:
+            pass
+    return installed
+
+
+def autostart_enabled(path=AUTOSTART_FILE):
+    """Whether the welcome app starts with the session for this user"""
+    try:
+        with open(path) as f:
+            entry = f.read()
+    except OSError:
+        # No per-user override: the system-wide entry decides
+        return os.path.exists(SYSTEM_AUTOSTART_FILE)
+    return "Hidden=true" not in entry and "X-GNOME-Autostart-enabled=false" not in entry
+
+
+def set_autostart(enabled, path=AUTOSTART_FILE):
+    """Write a per-user entry; Hidden=true also overrides the system-wide one"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(AUTOSTART_ENTRY.format(hidden=str(not enabled).lower(), enabled=str(enabled).lower()))
+
+
+def read_xsettings(path=XSETTINGS_FILE):
+    """xsettings channel properties as {"/Net/ThemeName": "Arc-Dark", ...}"""
+    values = {}
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return values
+
+    def walk(element, prefix):
+        for prop in element.findall("property"):
+            key = f"{prefix}/{prop.get('name')}"
+            if prop.get("type") != "empty":
+                values[key] = _typed(prop.get("type"), prop.get("value"))
+            walk(prop, key)
+
+    walk(root, "")
+    return values
+
+
+def _typed(kind, value):
+    if kind == "bool":
+        return value == "true"
+    if kind in ("int", "uint"):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+
+def _xfconf_type(value):
+    if isinstance(value, bool):
+        return "bool", str(value).lower()
+    if isinstance(value, int):
+        return "int", str(value)
+    return "string", str(value)
+
+
+def write_xsettings(changes, path=XSETTINGS_FILE):
+    """Set properties through xfconfd when a session is running, else in the channel file"""
+    if os.environ.get("DBUS_SESSION_BUS_ADDRESS") and shutil.which("xfconf-query"):
+        for key, value in changes.items():
+            kind, text = _xfconf_type(value)
+            subprocess.run(["xfconf-query", "-c", "xsettings", "-p", key, "-n", "-t", kind, "-s", text],
+                           check=True, capture_output=True)
+        return
+
+    try:
+        tree = ET.parse(path)
+        root = tree.getroot()
+    except (OSError, ET.ParseError):
+        root = ET.Element("channel", name="xsettings", version="1.0")
+        tree = ET.ElementTree(root)
+    for key, value in changes.items():
+        element = root
+        parts = key.strip("/").split("/")
+        for i, name in enumerate(parts):
+            child = next((p for p in element.findall("property") if p.get("name") == name), None)
+            if child is None:
+                child = ET.SubElement(element, "property", name=name, type="empty")
+            element = child
+        kind, text = _xfconf_type(value)
+        element.set("type", kind)
+        element.set("value", text)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tree.write(path, encoding="UTF-8", xml_declaration=True)
+
+
+def plan(manifest):
+    """Actions needed to bring this machine in line with the manifest"""
+    actions = []
+    flatpaks = installed_flatpaks()
+    packages = {name for name, _ in read_status()}
+
+    missing = [app.id for app in manifest["apps"] if app.backend == "flatpak" and app.id not in flatpaks]
+    if missing:
+        actions.append(Action("flatpak", "install " + " ".join(missing), missing))
+    missing = [app.id for app in manifest["apps"] if app.backend == "apt" and app.id not in packages]
+    if missing:
+        actions.append(Action("apt", "install " + " ".join(missing), missing))
+
+    if manifest["autostart"] is not None and manifest["autostart"] != autostart_enabled():
+        actions.append(Action("autostart", "enable" if manifest["autostart"] else "disable",
+                              manifest["autostart"]))
+
+    current = read_xsettings()
+    changes = {key: value for key, value in manifest["theme"].items() if current.get(key) != value}
+    if changes:
+        actions.append(Action("theme", "set " + ", ".join(sorted(changes)), changes))
+    return actions
+
+
+def _root_prefix():
+    return [] if os.geteuid() == 0 else ["pkexec"]
+
+
+def execute(action):
+    """Run one backend's batch; returns (action, ok, message)"""
+    try:
+        if action.backend == "flatpak":
+            # flathub is only configured system-wide; flatpak asks polkit when not root
+            command = ["flatpak", "install", "--system", "-y", "--noninteractive", "flathub"] + action.items
+            result = subprocess.run(command, capture_output=True, text=True)
+            return action, result.returncode == 0, result.stderr.strip()
+        if action.backend == "apt":
+            command = _root_prefix() + ["apt-get", "install", "-y", "--no-install-recommends"] + action.items
+            result = subprocess.run(command, capture_output=True, text=True,
+                                    env=dict(os.environ, DEBIAN_FRONTEND="noninteractive"))
+            return action, result.returncode == 0, result.stderr.strip()
+        if action.backend == "autostart":
+            set_autostart(action.items)
+        elif action.backend == "theme":
+            write_xsettings(action.items)
+        return action, True, ""
+    except (OSError, subprocess.CalledProcessError) as e:
+        return action, False, str(e)
+
+
+def apply(actions):
+    """Run every backend's batch concurrently; apt and flatpak use separate locks"""
+    if not actions:
+        return []
+    with ThreadPoolExecutor(max_workers=len(actions)) as pool:
+        return list(pool.map(execute, actions))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ferret-welcome --apply",
+                                     description="Provision this machine from a manifest without the GUI")
+    parser.add_argument("--apply", metavar="MANIFEST", required=True, help="JSON provisioning manifest")
+    parser.add_argument("--dry-run", action="store_true", help="show the actions without running them")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        actions = plan(load_manifest(args.apply))
+    except ManifestError as e:
+        print(f"ferret-welcome: {e}", file=sys.stderr)
+        return 2
+
+    if not actions:
+        print(f"Already provisioned ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return 0
+    for action in actions:
+        print(f"{action.backend}: {action.description}")
+    if args.dry_run:
+        return 0
+
+    failed = 0
+    for action, ok, message in apply(actions):
+        if not ok:
+            failed += 1
+            print(f"{action.backend}: failed: {message}", file=sys.stderr)
+    print(f"Applied {len(actions) - failed}/{len(actions)} actions in {time.perf_counter() - start:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+Ferret OS system information
+Small /proc readers shared by the UI and the system services
+"""
+
+
+def read_meminfo(path="/proc/meminfo"):
+    """MemTotal and MemAvailable in bytes"""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("MemTotal", "MemAvailable"):
+                    values[key] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return values.get("MemTotal", 0), values.get("MemAvailable", 0)
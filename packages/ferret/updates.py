@@ -0,0 +1,401 @@
+"""
+Ferret OS update checker
+Computes pending APT and Flatpak updates without root, from the local package lists
+"""
+
+import gzip
+import json
+import lzma
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from ferret.config import load_defaults
+
+APT_LISTS = "/var/lib/apt/lists"
+DPKG_STATUS = "/var/lib/dpkg/status"
+APT_CONF_DIR = "/etc/apt/apt.conf.d"
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ferret")
+INDEX_VERSION = 1
+
+Upgrade = namedtuple("Upgrade", "package architecture installed candidate security")
+
+OPENERS = {".gz": gzip.open, ".xz": lzma.open}
+
+
+def _order(char):
+    """dpkg character ordering: ~ sorts before everything, letters before symbols"""
+    if char == "~":
+        return -1
+    if char.isdigit():
+        return 0
+    if char.isalpha():
+        return ord(char)
+    return ord(char) + 256
+
+
+def _compare_part(a, b):
+    """Compare an upstream version or Debian revision the way dpkg does"""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i]) if i < len(a) and not a[i].isdigit() else 0
+            bc = _order(b[j]) if j < len(b) and not b[j].isdigit() else 0
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _split_version(version):
+    epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    return int(epoch or 0), upstream, revision
+
+
+def compare_versions(a, b):
+    """Negative, zero or positive like dpkg --compare-versions a lt/eq/gt b"""
+    if a == b:
+        return 0
+    a_epoch, a_upstream, a_revision = _split_version(a)
+    b_epoch, b_upstream, b_revision = _split_version(b)
+    if a_epoch != b_epoch:
+        return a_epoch - b_epoch
+    return _compare_part(a_upstream, b_upstream) or _compare_part(a_revision, b_revision)
+
+
+def _paragraphs(lines, fields):
+    """Yield the wanted fields of each deb822 paragraph, skipping everything else"""
+    record = {}
+    for line in lines:
+        if line == b"\n":
+            if record:
+                yield record
+                record = {}
+            continue
+        if line[:1] in (b" ", b"\t"):
+            continue
+        key, _, value = line.partition(b":")
+        if key in fields:
+            record[key.decode()] = value.strip().decode("utf-8", "replace")
+    if record:
+        yield record
+
+
+def read_status(path=DPKG_STATUS):
+    """Installed packages as {(name, arch): version}"""
+    installed = {}
+    try:
+        with open(path, "rb") as f:
+            for record in _paragraphs(f, (b"Package", b"Status", b"Version", b"Architecture")):
+                if record.get("Status", "").endswith(" installed") and "Version" in record:
+                    installed[(record["Package"], record.get("Architecture", "all"))] = record["Version"]
+    except OSError:
+        pass
+    return installed
+
+
+def read_packages(path):
+    """Newest version of each package in one Packages list as {(name, arch): version}"""
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    versions = {}
+    with opener(path, "rb") as f:
+        for record in _paragraphs(f, (b"Package", b"Version", b"Architecture")):
+            if "Package" not in record or "Version" not in record:
+                continue
+            key = (record["Package"], record.get("Architecture", "all"))
+            current = versions.get(key)
+            if current is None or compare_versions(record["Version"], current) > 0:
+                versions[key] = record["Version"]
+    return versions
+
+
+def release_file(lists_dir, packages_name):
+    """InRelease/Release list belonging to a Packages list, by apt's file naming"""
+    marker = packages_name.find("_dists_")
+    if marker < 0:
+        return None
+    suite_end = packages_name.find("_", marker + len("_dists_"))
+    prefix = packages_name[:suite_end + 1] if suite_end > 0 else packages_name
+    for name in ("InRelease", "Release"):
+        path = os.path.join(lists_dir, prefix + name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def is_security_source(lists_dir, packages_name):
+    """Security archives are recognised by their Release Label/Suite, or failing that the URL"""
+    path = release_file(lists_dir, packages_name)
+    if path:
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    if line == b"\n":
+                        break
+                    key, _, value = line.partition(b":")
+                    value = value.strip().lower()
+                    if key == b"Label" and b"security" in value:
+                        return True
+                    if key in (b"Suite", b"Codename") and value.endswith(b"-security"):
+                        return True
+        except OSError:
+            pass
+    return "security" in packages_name
+
+
+class PackageIndex:
+    """Parsed Packages lists kept on disk and refreshed only when a list changes"""
+
+    def __init__(self, lists_dir=APT_LISTS, cache_dir=CACHE_DIR):
+        self.lists_dir = lists_dir
+        self.path = os.path.join(cache_dir, "apt-index.pickle")
+        self.entries = {}
+        self.reparsed = 0
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("lists") == self.lists_dir:
+                self.entries = data["entries"]
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError, AttributeError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, "wb") as f:
+            pickle.dump({"version": INDEX_VERSION, "lists": self.lists_dir, "entries": self.entries},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, self.path)
+
+    def refresh(self):
+        """Reparse new or modified lists, drop removed ones; True if anything changed"""
+        self.reparsed = 0
+        seen = set()
+        try:
+            names = os.listdir(self.lists_dir)
+        except OSError:
+            names = []
+        for name in names:
+            base = name.rsplit(".", 1)[0] if name.endswith((".gz", ".xz")) else name
+            if not base.endswith("_Packages"):
+                continue
+            path = os.path.join(self.lists_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(name)
+            stamp = (st.st_mtime_ns, st.st_size)
+            entry = self.entries.get(name)
+            if entry and entry[0] == stamp:
+                continue
+            try:
+                versions = read_packages(path)
+            except (OSError, EOFError, lzma.LZMAError):
+                continue
+            self.entries[name] = (stamp, is_security_source(self.lists_dir, name), versions)
+            self.reparsed += 1
+
+        removed = [name for name in self.entries if name not in seen]
+        for name in removed:
+            del self.entries[name]
+        return bool(self.reparsed or removed)
+
+    def candidates(self, installed):
+        """Best available and best security version for each installed package"""
+        best, security = {}, {}
+        for _, is_security, versions in self.entries.values():
+            for key in installed:
+                version = versions.get(key)
+                if version is None:
+                    continue
+                if key not in best or compare_versions(version, best[key]) > 0:
+                    best[key] = version
+                if is_security and (key not in security or compare_versions(version, security[key]) > 0):
+                    security[key] = version
+        return best, security
+
+
+def flatpak_updates(timeout=120):
+    """Applications and runtimes with pending Flatpak updates (queries the remotes)"""
+    updates = []
+    for scope in ("--system", "--user"):
+        try:
+            result = subprocess.run(
+                ["flatpak", "remote-ls", "--updates", scope, "--columns=application"],
+                capture_output=True, text=True, timeout=timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            updates.extend(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return updates
+
+
+def automatic_policy(config):
+    """[Security] AutomaticUpdates as "security", "all" or "none\""""
+    value = config.get("Security", "AutomaticUpdates", fallback="security").strip().lower()
+    if value in ("false", "no", "off", "none"):
+        return "none"
+    return "all" if value in ("true", "yes", "on", "all") else "security"
+
+
+def unattended_upgrades_enabled(conf_dir=APT_CONF_DIR):
+    """Whether APT's periodic job actually runs unattended-upgrade"""
+    if not os.path.exists("/usr/bin/unattended-upgrade"):
+        return False
+    enabled = False
+    try:
+        names = sorted(os.listdir(conf_dir))
+    except OSError:
+        return False
+    # Later files override earlier ones, as APT reads them
+    for name in names:
+        try:
+            with open(os.path.join(conf_dir, name)) as f:
+                for line in f:
+                    if line.strip().startswith("APT::Periodic::Unattended-Upgrade"):
+                        enabled = line.split('"')[1:2] not in (["0"], [])
+        except OSError:
+            continue
+    return enabled
+
+
+class UpdateChecker:
+    """Pending updates for the welcome app, with the last result cached for instant display"""
+
+    def __init__(self, config=None, lists_dir=APT_LISTS, status_path=DPKG_STATUS, cache_dir=CACHE_DIR):
+        self.config = config if config is not None else load_defaults()
+        self.status_path = status_path
+        self.index = PackageIndex(lists_dir, cache_dir)
+        self.summary_path = os.path.join(cache_dir, "updates.json")
+
+    @property
+    def automatic(self):
+        """What unattended upgrades install by themselves: "security", "all" or "none\""""
+        return automatic_policy(self.config) if unattended_upgrades_enabled() else "none"
+
+    def cached(self):
+        """Last saved summary, or None if the checker has never run"""
+        try:
+            with open(self.summary_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def pending_apt(self):
+        """APT upgrades computed from the status database and the package lists"""
+        installed = read_status(self.status_path)
+        self.index.load()
+        if self.index.refresh():
+            self.index.save()
+        best, security = self.index.candidates(installed)
+
+        upgrades = []
+        for key, version in installed.items():
+            candidate = best.get(key)
+            if candidate and compare_versions(candidate, version) > 0:
+                fixed = security.get(key)
+                upgrades.append(Upgrade(key[0], key[1], version, candidate,
+                                        bool(fixed and compare_versions(fixed, version) > 0)))
+        upgrades.sort()
+        return upgrades
+
+    def summarize(self, upgrades, flatpaks):
+        security = sum(1 for upgrade in upgrades if upgrade.security)
+        automatic = {"all": len(upgrades), "security": security, "none": 0}[self.automatic]
+        return {
+            "checked": time.time(),
+            "apt": len(upgrades),
+            "security": security,
+            "automatic": automatic,
+            "manual": len(upgrades) - automatic,
+            "flatpak": len(flatpaks) if flatpaks is not None else None,
+        }
+
+    def check(self, include_flatpak=True):
+        """Recompute and save the summary; the Flatpak part queries the network"""
+        upgrades = self.pending_apt()
+        summary = self.summarize(upgrades, flatpak_updates() if include_flatpak else None)
+        if not include_flatpak:
+            summary["flatpak"] = (self.cached() or {}).get("flatpak")
+        self.save(summary)
+        return summary
+
+    def save(self, summary):
+        os.makedirs(os.path.dirname(self.summary_path), exist_ok=True)
+        temp = self.summary_path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(summary, f)
+        os.replace(temp, self.summary_path)
+
+    def check_async(self, callback):
+        """Report APT counts as soon as they are known, then again with Flatpak.
+
+        callback runs on a worker thread; GUI callers hand it to their main loop."""
+        def worker():
+            try:
+                callback(self.check(include_flatpak=False))
+                callback(self.check(include_flatpak=True))
+            except OSError:
+                pass
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+
+def describe(summary):
+    """One-line description of an update summary for the UI"""
+    if summary is None:
+        return "Checking for updates..."
+    parts = []
+    if summary["manual"]:
+        parts.append(f"{summary['manual']} package update{'s' if summary['manual'] != 1 else ''}")
+    if summary["automatic"]:
+        kind = "security update" if summary["automatic"] == summary["security"] else "update"
+        parts.append(f"{summary['automatic']} {kind}{'s' if summary['automatic'] != 1 else ''} "
+                     "installing automatically")
+    elif summary["security"]:
+        parts.append(f"{summary['security']} of them security")
+    if summary.get("flatpak"):
+        parts.append(f"{summary['flatpak']} Flatpak update{'s' if summary['flatpak'] != 1 else ''}")
+    return ", ".join(parts) if parts else "Your system is up to date"
+
+
+if __name__ == "__main__":
+    checker = UpdateChecker()
+    start = time.perf_counter()
+    upgrades = checker.pending_apt()
+    elapsed = (time.perf_counter() - start) * 1000
+    for upgrade in upgrades:
+        flag = " [security]" if upgrade.security else ""
+        print(f"{upgrade.package}:{upgrade.architecture} {upgrade.installed} -> {upgrade.candidate}{flag}")
+    summary = checker.summarize(upgrades, flatpak_updates() if "--flatpak" in sys.argv else None)
+    checker.save(summary)
+    print(describe(summary))
+    print(f"APT check: {elapsed:.1f} ms ({checker.index.reparsed} lists reparsed)")
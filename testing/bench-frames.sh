@@ -0,0 +1,82 @@
+#!/bin/bash
+
+# Ferret OS Welcome Frame Benchmark
+# Runs ferret-welcome headless under Xvfb, cycles through its pages with
+# animated transitions and reports frame times and dropped frames
+
+set -e
+
+# Configuration
+RUNS="${RUNS:-3}"
+SCREEN="${SCREEN:-1280x800x24}"
+SRC_DIR="$(dirname "$(readlink -f "$0")")/../packages"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+# Check requirements
+check_requirements() {
+    for tool in xvfb-run python3; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+
+    if ! python3 -c "import gi; gi.require_version('Gtk', '3.0')" 2>/dev/null; then
+        error "GTK 3 Python bindings not found (python3-gi, gir1.2-gtk-3.0)"
+    fi
+}
+
+# One benchmark run; extra arguments prefix the command (e.g. taskset)
+run_benchmark() {
+    PYTHONPATH="$SRC_DIR" xvfb-run -a -s "-screen 0 $SCREEN" \
+        "$@" python3 "$SRC_DIR/ferret-welcome.py" --frame-benchmark 2>/dev/null | tail -1
+}
+
+# Print one table row from the benchmark's JSON summary
+report() {
+    local label="$1" result="$2"
+    python3 -c '
+import json, sys
+r = json.loads(sys.argv[2])
+r["effects"] = "reduced" if r["degrades"] else "full"
+print("{0:<12} {frames:6} {dropped:7} {dropped_ratio:7.1%} {p50_ms:7.1f} {p95_ms:7.1f} {max_ms:7.1f}  {effects}".format(sys.argv[1], **r))
+' "$label" "$result" || warning "No result for $label"
+}
+
+main() {
+    check_requirements
+
+    log "Cycling through the welcome pages under Xvfb ($SCREEN, $RUNS runs per setup)..."
+    printf "%-12s %6s %7s %7s %7s %7s %7s  %s\n" "setup" "frames" "dropped" "ratio" "p50ms" "p95ms" "maxms" "effects"
+    for run in $(seq "$RUNS"); do
+        report "all cores" "$(run_benchmark)"
+        # A single core approximates the low-end machines test_memory_configs targets
+        report "one core" "$(run_benchmark taskset -c 0)"
+    done
+
+    success "Benchmark completed"
+}
+
+main "$@"
@@ -0,0 +1,120 @@
+#!/bin/bash
+
+# Ferret OS initramfs Benchmark
+# Builds the minimal and generic live initramfs with each compressor from
+# the build rootfs and reports image size and in-VM unpack time
+
+set -e
+
+# Configuration
+ROOT_DIR="${1:-iso/rootfs}"
+WORK_DIR="/tmp/ferret-bench-initramfs"
+VARIANTS="${VARIANTS:-minimal generic}"
+COMPRESSORS="${COMPRESSORS:-zstd lz4 xz}"
+RUNS="${RUNS:-3}"
+PACKAGES_DIR="$(dirname "$(readlink -f "$0")")/../packages"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+cleanup() {
+    rm -rf "$WORK_DIR"
+}
+
+# Check requirements
+check_requirements() {
+    if [[ $EUID -ne 0 ]]; then
+        error "This benchmark must be run as root (mkinitramfs runs in a chroot)"
+    fi
+
+    if [[ ! -d "$ROOT_DIR/lib/modules" ]]; then
+        error "No kernel modules in $ROOT_DIR; build the rootfs first"
+    fi
+
+    for tool in qemu-system-x86_64 python3; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+}
+
+# Unpack time in ms from one boot: the kernel unpacks the image, finds no
+# /nonexistent init and panics, and -no-reboot turns the panic into an exit
+unpack_time() {
+    local kernel="$1" initrd="$2"
+    local accel=()
+    [[ -w /dev/kvm ]] && accel=(-enable-kvm -cpu host)
+
+    timeout 120 qemu-system-x86_64 "${accel[@]}" -m 1024 -nographic -no-reboot \
+        -kernel "$kernel" -initrd "$initrd" \
+        -append "console=ttyS0 printk.time=1 rdinit=/nonexistent panic=-1" 2>/dev/null |
+        awk '
+            function stamp() { match($0, /[0-9]+\.[0-9]+\]/); return substr($0, RSTART, RLENGTH - 1) }
+            /Trying to unpack rootfs image as initramfs/ { start = stamp() }
+            /Freeing initrd memory/ && start != "" { printf "%.1f\n", (stamp() - start) * 1000; exit }
+        '
+}
+
+# Median of RUNS boots
+median_unpack() {
+    local times=()
+    for run in $(seq "$RUNS"); do
+        times+=("$(unpack_time "$@")")
+    done
+    printf "%s\n" "${times[@]}" | grep . | sort -n | awk '{ v[NR] = $1 } END { if (NR) print v[int((NR + 1) / 2)]; else print "n/a" }'
+}
+
+main() {
+    check_requirements
+    trap cleanup EXIT
+    mkdir -p "$WORK_DIR"
+
+    local kernel=$(find "$ROOT_DIR/boot" -name "vmlinuz-*" | sort | tail -1)
+    [[ -f "$kernel" ]] || error "Kernel not found in $ROOT_DIR/boot/"
+
+    log "Building images from $ROOT_DIR..."
+    for variant in $VARIANTS; do
+        for compress in $COMPRESSORS; do
+            PYTHONPATH="$PACKAGES_DIR" python3 -m ferret.initramfs --root "$ROOT_DIR" --variant "$variant" \
+                --compress "$compress" -o "$WORK_DIR/initrd-$variant-$compress" > /dev/null ||
+                warning "Build failed: $variant/$compress"
+        done
+    done
+
+    log "Booting each image $RUNS times (median unpack time)..."
+    printf "%-10s %-6s %10s %12s\n" "variant" "comp" "size" "unpack"
+    for variant in $VARIANTS; do
+        for compress in $COMPRESSORS; do
+            local image="$WORK_DIR/initrd-$variant-$compress"
+            [[ -f "$image" ]] || continue
+            local size=$(du -h "$image" | cut -f1)
+            local unpack=$(median_unpack "$kernel" "$image")
+            printf "%-10s %-6s %10s %10s ms\n" "$variant" "$compress" "$size" "$unpack"
+        done
+    done
+
+    success "Benchmark completed"
+}
+
+main "$@"
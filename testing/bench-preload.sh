@@ -0,0 +1,136 @@
+#!/bin/bash
+
+# Ferret OS Preload Benchmark
+# Replays a launch sequence of desktop applications and compares cold-start
+# time to first window with and without ferret-preload prefetching
+
+set -e
+
+# Configuration
+APPS="${APPS:-thunar firefox-esr libreoffice}"
+TRAIN_ROUNDS="${TRAIN_ROUNDS:-3}"
+ROUNDS="${ROUNDS:-3}"
+THINK_TIME="${THINK_TIME:-5}"
+WORK_DIR="/tmp/ferret-bench-preload"
+APP_USER="${SUDO_USER:-$USER}"
+PACKAGES_DIR="$(dirname "$(readlink -f "$0")")/../packages"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+PRELOAD_PID=""
+
+stop_preload() {
+    if [[ -n "$PRELOAD_PID" ]]; then
+        kill "$PRELOAD_PID" 2>/dev/null || true
+        wait "$PRELOAD_PID" 2>/dev/null || true
+        PRELOAD_PID=""
+    fi
+}
+
+cleanup() {
+    stop_preload
+    rm -rf "$WORK_DIR"
+}
+
+# Check requirements
+check_requirements() {
+    if [[ $EUID -ne 0 ]]; then
+        error "This benchmark must be run as root (drops the page cache)"
+    fi
+
+    if [[ -z "$DISPLAY" ]]; then
+        error "No X display; run from the desktop session with sudo -E"
+    fi
+
+    for tool in xdotool python3 $APPS; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+}
+
+start_preload() {
+    PYTHONPATH="$PACKAGES_DIR" python3 -m ferret.preload --state-dir "$WORK_DIR/state" \
+        run --force --interval 0.5 > /dev/null &
+    PRELOAD_PID=$!
+    sleep 1
+}
+
+# Launch one application as the desktop user and print the seconds until
+# its first window is mapped; the application is closed afterwards
+launch_app() {
+    local app="$1"
+    local start=$(date +%s.%N)
+    sudo -u "$APP_USER" env DISPLAY="$DISPLAY" XAUTHORITY="${XAUTHORITY:-}" "$app" > /dev/null 2>&1 &
+    local pid=$!
+    xdotool search --sync --onlyvisible --pid "$pid" > /dev/null 2>&1 ||
+        xdotool search --sync --onlyvisible --class "$app" > /dev/null 2>&1
+    local end=$(date +%s.%N)
+    sleep 1
+    pkill -u "$APP_USER" -f "$app" 2>/dev/null || true
+    wait "$pid" 2>/dev/null || true
+    awk "BEGIN { print $end - $start }"
+}
+
+# Run the launch sequence once, pausing between applications the way a user
+# does, which is when predicted applications get prefetched
+replay() {
+    local label="$1"
+    sync
+    echo 3 > /proc/sys/vm/drop_caches
+    for app in $APPS; do
+        printf "%-10s %-14s %8.2fs\n" "$label" "$app" "$(launch_app "$app")"
+        sleep "$THINK_TIME"
+    done
+}
+
+main() {
+    check_requirements
+    trap cleanup EXIT
+    mkdir -p "$WORK_DIR/state"
+
+    log "Training the launch model ($TRAIN_ROUNDS rounds)..."
+    start_preload
+    for round in $(seq "$TRAIN_ROUNDS"); do
+        for app in $APPS; do
+            launch_app "$app" > /dev/null
+            sleep 2
+        done
+    done
+    stop_preload
+    PYTHONPATH="$PACKAGES_DIR" python3 -m ferret.preload --state-dir "$WORK_DIR/state" stats
+
+    log "Replaying the sequence $ROUNDS times each (cold page cache per round)..."
+    for round in $(seq "$ROUNDS"); do
+        replay "baseline"
+        start_preload
+        replay "preload"
+        stop_preload
+    done
+
+    success "Benchmark completed"
+}
+
+main "$@"
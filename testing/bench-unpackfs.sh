@@ -0,0 +1,126 @@
+#!/bin/bash
+
+# Ferret OS unpackfs Benchmark
+# Compares the stock rsync-based unpack with the parallel ferretunpackfs
+# module by extracting a squashfs image onto a local loopback ext4 disk
+
+set -e
+
+# Configuration
+SOURCE_TREE="${1:-/usr}"
+WORK_DIR="/tmp/ferret-bench-unpackfs"
+IMAGE_SIZE="${IMAGE_SIZE:-}"
+WORKER_COUNTS="${WORKER_COUNTS:-1 2 4 $(nproc)}"
+MODULE="$(dirname "$(readlink -f "$0")")/../installer/modules/ferretunpackfs/main.py"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+cleanup() {
+    umount "$WORK_DIR/target" 2>/dev/null || true
+    umount "$WORK_DIR/squash" 2>/dev/null || true
+    rm -rf "$WORK_DIR"
+}
+
+# Check requirements
+check_requirements() {
+    if [[ $EUID -ne 0 ]]; then
+        error "This benchmark must be run as root (loop mounts, ownership)"
+    fi
+
+    for tool in mksquashfs mkfs.ext4 rsync python3; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+}
+
+# Build the squashfs image and the loopback target disk
+prepare_images() {
+    log "Preparing images from $SOURCE_TREE..."
+
+    mkdir -p "$WORK_DIR/squash" "$WORK_DIR/target"
+    mksquashfs "$SOURCE_TREE" "$WORK_DIR/filesystem.squashfs" -comp xz -no-progress -quiet
+
+    if [[ -z "$IMAGE_SIZE" ]]; then
+        local used_kb=$(du -sk "$SOURCE_TREE" | cut -f1)
+        IMAGE_SIZE="$(( used_kb * 2 / 1024 + 512 ))M"
+    fi
+
+    truncate -s "$IMAGE_SIZE" "$WORK_DIR/target.img"
+    success "Squashfs image: $(du -h "$WORK_DIR/filesystem.squashfs" | cut -f1), target disk: $IMAGE_SIZE"
+}
+
+# Format and mount a fresh target, with cold caches
+fresh_target() {
+    umount "$WORK_DIR/target" 2>/dev/null || true
+    mkfs.ext4 -q -F "$WORK_DIR/target.img"
+    mount -o loop "$WORK_DIR/target.img" "$WORK_DIR/target"
+    sync
+    echo 3 > /proc/sys/vm/drop_caches
+}
+
+# Time a command including the final sync to disk
+time_run() {
+    local start=$(date +%s.%N)
+    "$@" > /dev/null
+    sync
+    local end=$(date +%s.%N)
+    awk "BEGIN { print $end - $start }"
+}
+
+# Stock unpackfs: rsync from the loop-mounted squashfs
+bench_rsync() {
+    fresh_target
+    mount -t squashfs -o loop,ro "$WORK_DIR/filesystem.squashfs" "$WORK_DIR/squash"
+    local elapsed=$(time_run rsync -aHAXx "$WORK_DIR/squash/" "$WORK_DIR/target/")
+    umount "$WORK_DIR/squash"
+    printf "%-24s %8.2fs\n" "rsync (stock)" "$elapsed"
+}
+
+# Ferret parallel unpack with a given number of workers
+bench_ferret() {
+    local workers="$1"
+    fresh_target
+    local elapsed=$(time_run python3 "$MODULE" --workers "$workers" \
+        "$WORK_DIR/filesystem.squashfs" "$WORK_DIR/target")
+    printf "%-24s %8.2fs\n" "ferretunpackfs x$workers" "$elapsed"
+}
+
+main() {
+    check_requirements
+    trap cleanup EXIT
+
+    prepare_images
+
+    log "Running benchmarks (cold cache, including sync)..."
+    bench_rsync
+    for workers in $WORKER_COUNTS; do
+        bench_ferret "$workers"
+    done
+
+    success "Benchmark completed"
+}
+
+main "$@"
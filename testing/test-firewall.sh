@@ -0,0 +1,205 @@
+#!/bin/bash
+
+# Ferret OS Firewall Equivalence Test
+# Loads ufw-rules.conf with iptables-restore in one network namespace and the
+# compiled nftables ruleset in another, then probes both from a client
+# namespace and checks that every probe gets the same verdict
+
+set -e
+
+# Configuration
+SCRIPT_DIR="$(dirname "$(readlink -f "$0")")"
+RULES="${1:-$SCRIPT_DIR/../config/ufw-rules.conf}"
+TEST_DIR="/tmp/ferret-test-firewall"
+TCP_PORTS="22 53 80 443 8080"
+UDP_PORTS="53 68 5353 9999"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+cleanup() {
+    for ns in fw-legacy fw-nft fw-client; do
+        ip netns pids "$ns" 2>/dev/null | xargs -r kill 2>/dev/null || true
+        ip netns del "$ns" 2>/dev/null || true
+    done
+    rm -rf "$TEST_DIR"
+}
+
+# Check requirements
+check_requirements() {
+    if [[ $EUID -ne 0 ]]; then
+        error "This test must be run as root (network namespaces)"
+    fi
+
+    for tool in ip nft iptables-restore python3 ping; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+}
+
+# Client namespace wired to one firewalled namespace per implementation
+create_namespaces() {
+    log "Creating network namespaces..."
+
+    ip netns add fw-client
+    local index=1
+    for ns in fw-legacy fw-nft; do
+        ip netns add "$ns"
+        ip link add "cl$index" netns fw-client type veth peer name eth0 netns "$ns"
+        ip -n fw-client addr add "10.77.$index.1/24" dev "cl$index"
+        ip -n "$ns" addr add "10.77.$index.2/24" dev eth0
+        ip -n fw-client link set "cl$index" up
+        ip -n "$ns" link set eth0 up
+        ip -n "$ns" link set lo up
+        index=$((index + 1))
+    done
+    ip -n fw-client link set lo up
+}
+
+# Load both rulesets
+load_rulesets() {
+    log "Loading rulesets..."
+
+    mkdir -p "$TEST_DIR"
+    # iptables-restore wants chain declarations instead of -P lines
+    {
+        echo "*filter"
+        sed -E 's/^-P ([A-Z]+) ([A-Z]+)/:\1 \2 [0:0]/' "$RULES"
+    } > "$TEST_DIR/legacy.rules"
+    ip netns exec fw-legacy iptables-restore < "$TEST_DIR/legacy.rules"
+
+    PYTHONPATH="$SCRIPT_DIR/../packages" python3 -m ferret.firewall compile "$RULES" \
+        -o "$TEST_DIR/firewall.nft"
+    ip netns exec fw-nft nft -f "$TEST_DIR/firewall.nft"
+}
+
+# Listeners on every probed port inside the firewalled namespaces
+start_servers() {
+    cat > "$TEST_DIR/server.py" << 'SERVER_EOF'
+import socket, sys, threading
+
+def tcp(port):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(("0.0.0.0", port))
+    s.listen()
+    while True:
+        s.accept()[0].close()
+
+def udp(port):
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("0.0.0.0", port))
+    while True:
+        data, peer = s.recvfrom(64)
+        s.sendto(data, peer)
+
+for port in sys.argv[1].split():
+    threading.Thread(target=tcp, args=(int(port),), daemon=True).start()
+for port in sys.argv[2].split():
+    threading.Thread(target=udp, args=(int(port),), daemon=True).start()
+threading.Event().wait()
+SERVER_EOF
+
+    for ns in fw-legacy fw-nft; do
+        ip netns exec "$ns" python3 "$TEST_DIR/server.py" "$TCP_PORTS" "$UDP_PORTS" &
+    done
+    sleep 1
+}
+
+# Probe one namespace and print one "probe verdict" line per check
+probe() {
+    local address="$1"
+    ip netns exec fw-client python3 - "$address" "$TCP_PORTS" "$UDP_PORTS" << 'PROBE_EOF'
+import socket, sys
+
+address, tcp_ports, udp_ports = sys.argv[1], sys.argv[2].split(), sys.argv[3].split()
+
+for port in tcp_ports:
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(1)
+    verdict = "open" if s.connect_ex((address, int(port))) == 0 else "filtered"
+    print(f"tcp/{port} {verdict}")
+
+for port in udp_ports:
+    for source in (0, 67):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.settimeout(1)
+        s.bind(("0.0.0.0", source))
+        s.sendto(b"ferret", (address, int(port)))
+        try:
+            s.recvfrom(64)
+            verdict = "open"
+        except OSError:
+            verdict = "filtered"
+        s.close()
+        print(f"udp/{port} sport={source} {verdict}")
+PROBE_EOF
+    if ip netns exec fw-client ping -c 1 -W 1 "$address" > /dev/null 2>&1; then
+        echo "icmp/echo open"
+    else
+        echo "icmp/echo filtered"
+    fi
+}
+
+# Outbound connections from the firewalled side must get their replies
+probe_established() {
+    local ns="$1" client="$2"
+    if ip netns exec "$ns" ping -c 1 -W 1 "$client" > /dev/null 2>&1; then
+        echo "outbound/established open"
+    else
+        echo "outbound/established filtered"
+    fi
+}
+
+compare() {
+    log "Probing both namespaces..."
+
+    { probe 10.77.1.2; probe_established fw-legacy 10.77.1.1; } > "$TEST_DIR/legacy.result"
+    { probe 10.77.2.2; probe_established fw-nft 10.77.2.1; } > "$TEST_DIR/nft.result"
+
+    paste "$TEST_DIR/legacy.result" "$TEST_DIR/nft.result" | \
+        awk -F'\t' '{ printf "%-28s %-28s %s\n", $1, $2, ($1 == $2 ? "" : "MISMATCH") }'
+
+    if ! diff -q "$TEST_DIR/legacy.result" "$TEST_DIR/nft.result" > /dev/null; then
+        error "Compiled ruleset does not behave like ufw-rules.conf"
+    fi
+}
+
+main() {
+    check_requirements
+    trap cleanup EXIT
+
+    create_namespaces
+    load_rulesets
+    start_servers
+    compare
+
+    log "Rule-evaluation microbenchmark:"
+    PYTHONPATH="$SCRIPT_DIR/../packages" python3 -m ferret.firewall bench "$RULES"
+
+    success "Firewall equivalence test completed"
+}
+
+main "$@"
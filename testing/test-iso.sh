@@ -44,8 +44,18 @@ check_iso() {
     
     log "Testing ISO: $ISO_PATH"
     
-    # Check ISO integrity
-    if command -v sha256sum &> /dev/null; then
+    # Check ISO integrity: chunk manifest (parallel, reports damaged regions)
+    # when the build produced one, whole-file checksum otherwise
+    if [[ -f "${ISO_PATH}.merkle" ]] && command -v python3 &> /dev/null; then
+        log "Verifying ISO chunks..."
+        if PYTHONPATH="$(dirname "$(readlink -f "$0")")/../packages" \
+            python3 -m ferret.mediacheck verify "${ISO_PATH}.merkle" \
+            --state "${ISO_PATH}.mediacheck-state"; then
+            success "ISO chunks verified"
+        else
+            error "ISO verification failed"
+        fi
+    elif command -v sha256sum &> /dev/null; then
         if [[ -f "${ISO_PATH}.sha256" ]]; then
             log "Verifying ISO checksum..."
             if sha256sum -c "${ISO_PATH}.sha256"; then
@@ -0,0 +1,116 @@
+#!/bin/bash
+
+# Ferret OS Media Check Test
+# Corrupts and truncates files covered by a chunk manifest, checks that
+# ferret-mediacheck reports the damaged regions, then repairs them and checks
+# that a resumed verification with the same --state file passes again
+
+set -e
+
+# Configuration
+SCRIPT_DIR="$(dirname "$(readlink -f "$0")")"
+TEST_DIR="/tmp/ferret-test-mediacheck"
+CHUNK_SIZE=65536
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+cleanup() {
+    rm -rf "$TEST_DIR"
+}
+
+mediacheck() {
+    PYTHONPATH="$SCRIPT_DIR/../packages" python3 -m ferret.mediacheck "$@"
+}
+
+# Verify with the shared state file; expect the given exit code and save the output
+verify_expect() {
+    local expected="$1" rc=0
+    mediacheck verify "$TEST_DIR/manifest.json" --root "$TEST_DIR/media" \
+        --state "$TEST_DIR/state" --no-direct > "$TEST_DIR/output" 2>&1 || rc=$?
+    cat "$TEST_DIR/output"
+    if [[ $rc -ne $expected ]]; then
+        error "ferret-mediacheck verify exited with $rc, expected $expected"
+    fi
+}
+
+create_media() {
+    log "Creating test media..."
+
+    mkdir -p "$TEST_DIR/media"
+    head -c $((CHUNK_SIZE * 4)) /dev/urandom > "$TEST_DIR/media/image"
+    head -c $((CHUNK_SIZE * 2 + 100)) /dev/urandom > "$TEST_DIR/media/tail"
+    cp "$TEST_DIR/media/image" "$TEST_DIR/image.good"
+    cp "$TEST_DIR/media/tail" "$TEST_DIR/tail.good"
+    mediacheck generate image tail --root "$TEST_DIR/media" \
+        -o "$TEST_DIR/manifest.json" --chunk-size "$CHUNK_SIZE" --no-direct
+}
+
+# A corrupted chunk fails, and passes again once the file is replaced
+test_repair() {
+    log "Corrupting one chunk..."
+
+    printf 'ferret' | dd of="$TEST_DIR/media/image" bs=1 seek=$((CHUNK_SIZE + 10)) conv=notrunc 2> /dev/null
+    verify_expect 1
+    grep -q "CORRUPT image: bytes $CHUNK_SIZE-$((CHUNK_SIZE * 2 - 1)) " "$TEST_DIR/output" || \
+        error "Corrupt chunk not reported"
+
+    log "Restoring the good file..."
+    cp "$TEST_DIR/image.good" "$TEST_DIR/media/image"
+    verify_expect 0
+    success "Repaired file passes with the same state file"
+}
+
+# A truncated file reports its missing bytes once, not once per overlapping region
+test_truncation() {
+    log "Truncating a file..."
+
+    truncate -s $((CHUNK_SIZE + 50)) "$TEST_DIR/media/tail"
+    verify_expect 1
+    if [[ $(grep -c "CORRUPT tail" "$TEST_DIR/output") -ne 1 ]]; then
+        error "Truncated region reported more than once"
+    fi
+    grep -q "CORRUPT tail: bytes $CHUNK_SIZE-$((CHUNK_SIZE * 2 + 99)) " "$TEST_DIR/output" || \
+        error "Truncated region not reported"
+
+    cp "$TEST_DIR/tail.good" "$TEST_DIR/media/tail"
+    verify_expect 0
+    success "Truncated file reported as one region"
+}
+
+main() {
+    if ! command -v python3 &> /dev/null; then
+        error "Required tool not found: python3"
+    fi
+    trap cleanup EXIT
+    cleanup
+
+    create_media
+    test_repair
+    test_truncation
+
+    success "Media check test completed"
+}
+
+main "$@"
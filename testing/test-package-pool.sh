@@ -0,0 +1,152 @@
+#!/bin/bash
+
+# Ferret OS Offline Package Stage Test
+# Runs the ferretpackages installer stage against a throwaway overlay of the
+# built root filesystem inside a network namespace with no network at all
+
+set -e
+
+# Configuration
+SCRIPT_DIR="$(dirname "$(readlink -f "$0")")"
+BASE_ROOT="${1:-$SCRIPT_DIR/../iso/rootfs}"
+MODULE="$SCRIPT_DIR/../installer/modules/ferretpackages/main.py"
+TEST_DIR="/tmp/ferret-test-pool"
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+log() {
+    echo -e "${BLUE}[$(date +'%Y-%m-%d %H:%M:%S')]${NC} $1"
+}
+
+success() {
+    echo -e "${GREEN}[SUCCESS]${NC} $1"
+}
+
+warning() {
+    echo -e "${YELLOW}[WARNING]${NC} $1"
+}
+
+error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+    exit 1
+}
+
+cleanup() {
+    umount "$TEST_DIR/merged" 2>/dev/null || true
+    rm -rf "$TEST_DIR"
+}
+
+# Check requirements
+check_requirements() {
+    if [[ $EUID -ne 0 ]]; then
+        error "This test must be run as root (overlay mount, chroot)"
+    fi
+
+    if [[ ! -f "$BASE_ROOT/var/lib/dpkg/status" ]]; then
+        error "No root filesystem at $BASE_ROOT (run build-ferret-os.sh first or pass a root)"
+    fi
+
+    for tool in dpkg-deb unshare python3; do
+        if ! command -v "$tool" &> /dev/null; then
+            error "Required tool not found: $tool"
+        fi
+    done
+}
+
+# Build a small package with optional dependency and trigger files
+make_package() {
+    local name="$1" depends="$2" triggers="$3" postinst="$4"
+    local pkg_dir="$TEST_DIR/src/$name"
+
+    mkdir -p "$pkg_dir/DEBIAN" "$pkg_dir/usr/share/doc/$name"
+    echo "$name" > "$pkg_dir/usr/share/doc/$name/README"
+
+    cat > "$pkg_dir/DEBIAN/control" << EOF
+Package: $name
+Version: 1.0
+Architecture: all
+Maintainer: Ferret OS Team <team@ferret-os.org>
+Description: Ferret OS package pool test package
+EOF
+    [[ -n "$depends" ]] && echo "Depends: $depends" >> "$pkg_dir/DEBIAN/control"
+    [[ -n "$triggers" ]] && echo "$triggers" > "$pkg_dir/DEBIAN/triggers"
+    if [[ -n "$postinst" ]]; then
+        printf '#!/bin/sh\n%s\n' "$postinst" > "$pkg_dir/DEBIAN/postinst"
+        chmod 755 "$pkg_dir/DEBIAN/postinst"
+    fi
+
+    dpkg-deb --build --root-owner-group "$pkg_dir" "$TEST_DIR/pool/debs/$name.deb" > /dev/null
+}
+
+# Create a pool of packages that all activate one trigger
+create_pool() {
+    log "Creating test pool..."
+
+    mkdir -p "$TEST_DIR/pool/debs"
+    make_package ferret-test-base "" "interest-noawait ferret-test-trigger" \
+        '[ "$1" = triggered ] && echo run >> /var/log/ferret-test-trigger.log; exit 0'
+    make_package ferret-test-app "ferret-test-base" "activate-noawait ferret-test-trigger"
+    make_package ferret-test-extra "ferret-test-base" "activate-noawait ferret-test-trigger"
+
+    python3 "$MODULE" --pool "$TEST_DIR/pool" --build-manifest
+}
+
+# Mount a copy-on-write view of the root filesystem
+create_overlay() {
+    log "Creating overlay of $BASE_ROOT..."
+
+    mkdir -p "$TEST_DIR/upper" "$TEST_DIR/work" "$TEST_DIR/merged"
+    mount -t overlay overlay \
+        -o lowerdir="$BASE_ROOT",upperdir="$TEST_DIR/upper",workdir="$TEST_DIR/work" \
+        "$TEST_DIR/merged"
+}
+
+# Run the package stage with networking unavailable
+run_stage() {
+    log "Running package stage offline..."
+
+    unshare --net python3 "$MODULE" --pool "$TEST_DIR/pool" --root "$TEST_DIR/merged"
+
+    # Re-running must be a no-op
+    local plan=$(python3 "$MODULE" --pool "$TEST_DIR/pool" --root "$TEST_DIR/merged" --dry-run)
+    if echo "$plan" | grep -q '\.deb'; then
+        error "Second run still plans package installs"
+    fi
+}
+
+# Verify installed packages and trigger batching
+verify() {
+    log "Verifying results..."
+
+    for pkg in ferret-test-base ferret-test-app ferret-test-extra; do
+        if ! chroot "$TEST_DIR/merged" dpkg-query -W -f='${Status}\n' "$pkg" | grep -q "install ok installed"; then
+            error "$pkg is not installed"
+        fi
+    done
+
+    local runs=$(wc -l < "$TEST_DIR/merged/var/log/ferret-test-trigger.log")
+    if [[ "$runs" -ne 1 ]]; then
+        error "Trigger ran $runs times, expected exactly once"
+    fi
+
+    success "Pool installed offline with a single trigger run"
+}
+
+main() {
+    check_requirements
+    trap cleanup EXIT
+
+    create_pool
+    create_overlay
+    run_stage
+    verify
+
+    success "Offline package stage test completed"
+}
+
+main "$@"